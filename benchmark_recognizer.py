@@ -0,0 +1,195 @@
+# timing of the $1 hot path (resample, template normalization,
+# distance_at_best_angle, recognize) on the XML datasets, without a window.
+# results go to a JSON file so runs before/after a change can be compared:
+#   python benchmark_recognizer.py --out before.json
+#   python benchmark_recognizer.py --compare before.json
+from __future__ import annotations
+
+import argparse
+import datetime as _dt
+import json
+import platform
+import subprocess
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+import dollar as rz
+from dollar.datasets import CACHE_DIR, DATASET_DIRS, load_dataset
+
+TEMPLATE_COUNTS = (5, 50, 200, 1000)
+STROKE_LENGTHS  = (32, 128, 512)
+# jitter for template copies beyond the dataset size, in pixels
+TEMPLATE_NOISE  = 3.0
+
+
+def _time_calls(fn: Callable[[], object], repeat: int,
+                warmup: int = 5) -> np.ndarray:
+    #per-call wall time in seconds
+    for _ in range(warmup):
+        fn()
+    times = np.empty(repeat)
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times[i] = time.perf_counter() - t0
+    return times
+
+
+def _summary(case: str, times: np.ndarray, **params) -> Dict[str, object]:
+    p50, p95, p99 = np.percentile(times, (50, 95, 99)) * 1e3
+    return {
+        "case"      : case,
+        **params,
+        "calls"     : int(len(times)),
+        "mean_ms"   : float(times.mean() * 1e3),
+        "p50_ms"    : float(p50),
+        "p95_ms"    : float(p95),
+        "p99_ms"    : float(p99),
+        "per_second": float(len(times) / times.sum()),
+    }
+
+
+def _strokes(length: int, raw: Sequence[np.ndarray]) -> List[np.ndarray]:
+    #dataset strokes brought to `length` points, so only the length varies
+    return [rz.resample(pts, length) for pts in raw]
+
+
+def _template_set(samples, count: int, rng: np.random.Generator
+                  ) -> List[rz.Template]:
+    #the dataset as is, then jittered copies until there are count templates
+    out = []
+    for i in range(count):
+        s = samples[i % len(samples)]
+        pts = s.points
+        if i >= len(samples):
+            pts = pts + rng.normal(0.0, TEMPLATE_NOISE, pts.shape)
+        out.append(rz.Template(s.name, pts))
+    return out
+
+
+def run(datasets: Sequence[str] = tuple(DATASET_DIRS),
+        template_counts: Sequence[int] = TEMPLATE_COUNTS,
+        stroke_lengths: Sequence[int] = STROKE_LENGTHS,
+        repeat: int = 200, method: str = rz.MATCH_GOLDEN,
+        seed: int = 0) -> List[Dict[str, object]]:
+    rng = np.random.default_rng(seed)
+    samples = [s for key in datasets for s in load_dataset(key)]
+    raw = [s.points for s in samples]
+    results = []
+
+    for length in stroke_lengths:
+        strokes = _strokes(length, raw)
+        it = iter(range(1 << 62))
+        pick = lambda: strokes[next(it) % len(strokes)]
+
+        results.append(_summary("resample", _time_calls(
+            lambda: rz.resample(pick()), repeat), stroke_points=length))
+        results.append(_summary("template", _time_calls(
+            lambda: rz.Template("", pick()), repeat), stroke_points=length))
+
+    # candidates and templates are both normalized, so the stroke length
+    # doesn't matter for the matching itself
+    candidates = [np.asarray(rz.Template("", pts).points, dtype=float)
+                  for pts in raw]
+    it = iter(range(1 << 62))
+    pair = lambda: (candidates[next(it) % len(candidates)],
+                    candidates[(next(it) * 7 + 3) % len(candidates)])
+
+    def one_distance():
+        a, b = pair()
+        rz.distance_at_best_angle(a, b, -rz.ANGLE_RANGE, rz.ANGLE_RANGE,
+                                  rz.ANGLE_PRECISION)
+    results.append(_summary("distance_at_best_angle",
+                            _time_calls(one_distance, repeat)))
+
+    for count in template_counts:
+        recognizer = rz.DollarRecognizer(window_h=0, method=method)
+        recognizer.add_templates(_template_set(samples, count, rng))
+        for length in stroke_lengths:
+            strokes = _strokes(length, raw)
+            it = iter(range(1 << 62))
+            results.append(_summary("recognize", _time_calls(
+                lambda: recognizer.recognize(strokes[next(it) % len(strokes)]),
+                repeat), templates=count, stroke_points=length, method=method))
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                             cwd=Path(__file__).parent, capture_output=True,
+                             text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _key(row: Dict[str, object]) -> tuple:
+    return (row["case"], row.get("templates"), row.get("stroke_points"),
+            row.get("method"))
+
+
+def _print_table(results: List[Dict[str, object]],
+                 baseline: Optional[List[Dict[str, object]]] = None) -> None:
+    old = {_key(r): r for r in baseline or []}
+    print(f"{'case':24} {'tmpl':>5} {'pts':>5} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'per s':>10}" + ("  p50 vs old" if old else ""))
+    for r in results:
+        line = (f"{r['case']:24} {r.get('templates') or '':>5} "
+                f"{r.get('stroke_points') or '':>5} {r['p50_ms']:9.3f} "
+                f"{r['p95_ms']:9.3f} {r['p99_ms']:9.3f} {r['per_second']:10.0f}")
+        prev = old.get(_key(r))
+        if prev:
+            line += f"  x{prev['p50_ms'] / r['p50_ms']:.2f}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the $1 recognizer on the XML datasets.")
+    parser.add_argument("--datasets", nargs="+", default=list(DATASET_DIRS),
+                        choices=list(DATASET_DIRS))
+    parser.add_argument("--templates", nargs="+", type=int,
+                        default=list(TEMPLATE_COUNTS))
+    parser.add_argument("--lengths", nargs="+", type=int,
+                        default=list(STROKE_LENGTHS))
+    parser.add_argument("--repeat", type=int, default=200,
+                        help="timed calls per case")
+    parser.add_argument("--method", default=rz.MATCH_GOLDEN,
+                        choices=[rz.MATCH_GOLDEN, rz.MATCH_PROTRACTOR, rz.MATCH_COARSE])
+    parser.add_argument("--out", type=Path, default=None,
+                        help="JSON file (default .cache/bench/recognizer_<time>.json)")
+    parser.add_argument("--compare", type=Path, default=None,
+                        help="earlier JSON result to show the speedup against")
+    args = parser.parse_args()
+
+    results = run(args.datasets, args.templates, args.lengths,
+                  args.repeat, args.method)
+    stamp = _dt.datetime.now()
+    report = {
+        "created" : stamp.isoformat(timespec="seconds"),
+        "commit"  : _git_commit(),
+        "python"  : platform.python_version(),
+        "numpy"   : np.__version__,
+        "machine" : f"{platform.system()} {platform.machine()} {platform.processor()}".strip(),
+        "datasets": args.datasets,
+        "repeat"  : args.repeat,
+        "results" : results,
+    }
+
+    out = args.out or CACHE_DIR / "bench" / f"recognizer_{stamp:%Y%m%d_%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))["results"]
+    _print_table(results, baseline)
+    print(f"written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# comet positions and velocities for the game as numpy arrays, moved in one
+# step per frame, plus a per-shape uniform grid for the "closest comet with
+# this shape" query (cell size = hit distance, so only 3x3 cells are checked)
+from __future__ import annotations
+
+import math
+import time
+from typing import Any, List, Sequence, Tuple
+
+import numpy as np
+
+# grid cell coordinates are packed into one int64 key per comet:
+# (shape * GRID_SPAN + cell_y) * GRID_SPAN + cell_x, both shifted by GRID_OFFSET
+GRID_SPAN   = 1 << 16
+GRID_OFFSET = 1 << 15
+
+
+class CometField:
+    def __init__(self, shapes: Sequence[str], center: Tuple[float, float],
+                 hit_distance: float, capacity: int = 64):
+        self._shape_ids = {name: i for i, name in enumerate(shapes)}
+        self.center = np.asarray(center, dtype=float)
+        self.hit_distance = float(hit_distance)
+
+        self.pos    = np.zeros((capacity, 2))
+        self.vel    = np.zeros((capacity, 2))
+        self.shape  = np.zeros(capacity, dtype=np.int64)
+        self.active = np.zeros(capacity, dtype=bool)
+        self._owners: List[Any] = [None] * capacity
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+
+        self._grid_dirty = True
+        self._grid_keys  = np.empty(0, dtype=np.int64)
+        self._grid_slots = np.empty(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return int(self.active.sum())
+
+    def _grow(self) -> None:
+        old = len(self.pos)
+        new = old * 2
+        for name in ("pos", "vel", "shape", "active"):
+            arr = getattr(self, name)
+            grown = np.zeros((new,) + arr.shape[1:], dtype=arr.dtype)
+            grown[:old] = arr
+            setattr(self, name, grown)
+        self._owners.extend([None] * old)
+        self._free.extend(range(new - 1, old - 1, -1))
+
+    def add(self, shape: str, x: float, y: float, vx: float, vy: float,
+            owner: Any = None) -> int:
+        """vx, vy in px/s. Returns the slot, owner is what nearest() hands back."""
+        if not self._free:
+            self._grow()
+        slot = self._free.pop()
+        self.pos[slot]    = (x, y)
+        self.vel[slot]    = (vx, vy)
+        self.shape[slot]  = self._shape_ids[shape]
+        self.active[slot] = True
+        self._owners[slot] = owner
+        self._grid_dirty = True
+        return slot
+
+    def remove(self, slot: int) -> None:
+        if not self.active[slot]:
+            return
+        self.active[slot] = False
+        self._owners[slot] = None
+        self._free.append(slot)
+        self._grid_dirty = True
+
+    def clear(self) -> None:
+        for slot in np.flatnonzero(self.active):
+            self.remove(int(slot))
+
+    def step(self, delta_time: float, earth_radius: float) -> np.ndarray:
+        """Move every active comet, returns the slots now inside earth_radius."""
+        active = self.active
+        self.pos[active] += self.vel[active] * delta_time
+        self._grid_dirty = True
+
+        diff = self.pos - self.center
+        dist_sq = np.einsum("ij,ij->i", diff, diff)
+        return np.flatnonzero(active & (dist_sq < earth_radius * earth_radius))
+
+    def _cells(self, xy: np.ndarray) -> np.ndarray:
+        return np.floor(xy / self.hit_distance).astype(np.int64) + GRID_OFFSET
+
+    def _rebuild_grid(self) -> None:
+        slots = np.flatnonzero(self.active)
+        cells = self._cells(self.pos[slots])
+        keys  = (self.shape[slots] * GRID_SPAN + cells[:, 1]) * GRID_SPAN + cells[:, 0]
+        order = np.argsort(keys, kind="stable")
+        self._grid_keys  = keys[order]
+        self._grid_slots = slots[order]
+        self._grid_dirty = False
+
+    def nearest(self, shape: str, x: float, y: float) -> Any:
+        """Owner of the closest active comet with this shape within
+        hit_distance of (x, y), or None."""
+        shape_id = self._shape_ids.get(shape)
+        if shape_id is None:
+            return None
+        if self._grid_dirty:
+            self._rebuild_grid()
+
+        cx, cy = self._cells(np.array([x, y], dtype=float))
+        # the three cells of a grid row have consecutive keys
+        row_keys = (shape_id * GRID_SPAN + cy + np.arange(-1, 2)) * GRID_SPAN + cx
+        lo = np.searchsorted(self._grid_keys, row_keys - 1, side="left")
+        hi = np.searchsorted(self._grid_keys, row_keys + 1, side="right")
+        if not (hi > lo).any():
+            return None
+        slots = np.concatenate([self._grid_slots[a:b] for a, b in zip(lo, hi)])
+
+        diff = self.pos[slots] - (x, y)
+        dist_sq = np.einsum("ij,ij->i", diff, diff)
+        best = int(np.argmin(dist_sq))
+        if dist_sq[best] >= self.hit_distance * self.hit_distance:
+            return None
+        return self._owners[int(slots[best])]
+
+
+def _stress(count: int = 500, frames: int = 600, seed: int = 0) -> None:
+    #headless timing of the per-frame work for `count` simultaneous comets
+    rng = np.random.default_rng(seed)
+    shapes = ["rectangle", "circle", "delete", "pigtail", "check"]
+    field = CometField(shapes, (640, 640), hit_distance=300)
+    for i in range(count):
+        angle = rng.uniform(0, 2 * math.pi)
+        x, y = 640 + 900 * math.cos(angle), 640 + 900 * math.sin(angle)
+        speed = rng.uniform(40, 90)
+        field.add(shapes[i % len(shapes)], x, y,
+                  -math.cos(angle) * speed, -math.sin(angle) * speed, owner=i)
+
+    step_s = query_s = 0.0
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        field.step(1 / 60, 64)
+        t1 = time.perf_counter()
+        field.nearest(shapes[int(rng.integers(len(shapes)))], *rng.uniform(0, 1280, 2))
+        t2 = time.perf_counter()
+        step_s += t1 - t0
+        query_s += t2 - t1
+    print(f"{count} comets: step {step_s / frames * 1e6:.1f} us, "
+          f"nearest {query_s / frames * 1e6:.1f} us per frame")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Time CometField with many comets.")
+    parser.add_argument("--comets", type=int, default=500)
+    parser.add_argument("--frames", type=int, default=600)
+    args = parser.parse_args()
+    _stress(args.comets, args.frames)
@@ -0,0 +1,258 @@
+# smoothing filters for the fingertip -> cursor path of HandMover, plus a
+# replay benchmark that measures how much lag and jitter each one leaves
+from __future__ import annotations
+
+import argparse
+import math
+import sys
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+class CursorFilter:
+    def __call__(self, x: float, y: float, t: float) -> Tuple[float, float]:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        pass
+
+
+class ExponentialFilter(CursorFilter):
+    """Fixed exponential smoothing, what HandMover always did (SMOOTHING)."""
+
+    def __init__(self, alpha: float = 0.33):
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self) -> None:
+        self._pos: Optional[Tuple[float, float]] = None
+
+    def __call__(self, x, y, t):
+        if self._pos is None:
+            self._pos = (x, y)
+        else:
+            px, py = self._pos
+            self._pos = (px + (x - px) * self.alpha, py + (y - py) * self.alpha)
+        return self._pos
+
+
+def _smoothing_factor(cutoff: float, dt: float) -> float:
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter(CursorFilter):
+    """Casiez et al. 2012: low cutoff (strong smoothing) while the hand is
+    slow, the cutoff rises with speed so fast strokes get little lag."""
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 0.02,
+                 d_cutoff: float = 1.0):
+        self.min_cutoff = min_cutoff
+        self.beta       = beta
+        self.d_cutoff   = d_cutoff
+        self.reset()
+
+    def reset(self) -> None:
+        self._pos: Optional[np.ndarray] = None
+        self._vel = np.zeros(2)
+        self._t   = 0.0
+
+    def __call__(self, x, y, t):
+        p = np.array((x, y), dtype=float)
+        if self._pos is None or t <= self._t:
+            self._pos, self._t = p, t
+            return x, y
+        dt, self._t = t - self._t, t
+
+        a_d = _smoothing_factor(self.d_cutoff, dt)
+        self._vel += a_d * ((p - self._pos) / dt - self._vel)
+        cutoff = self.min_cutoff + self.beta * float(np.hypot(*self._vel))
+        self._pos = self._pos + _smoothing_factor(cutoff, dt) * (p - self._pos)
+        return float(self._pos[0]), float(self._pos[1])
+
+
+class KalmanFilter(CursorFilter):
+    """Constant velocity Kalman filter per axis. The returned position can be
+    extrapolated predict_frames frames ahead to hide the pipeline latency,
+    off by default because it amplifies the tracking noise beyond raw."""
+
+    def __init__(self, process_noise: float = 2000.0,
+                 measurement_noise: float = 6.0,
+                 predict_frames: float = 0.0):
+        self.q = process_noise       # px/s^2, how fast the hand may accelerate
+        self.r = measurement_noise   # px, tracking noise of the fingertip
+        self.predict_frames = predict_frames
+        self.reset()
+
+    def reset(self) -> None:
+        self._x: Optional[np.ndarray] = None   # (2 axes, [pos, vel])
+        self._P = np.zeros((2, 2, 2))
+        self._t = 0.0
+
+    def __call__(self, x, y, t):
+        z = np.array((x, y), dtype=float)
+        if self._x is None or t <= self._t:
+            self._x = np.stack((z, np.zeros(2)), axis=1)
+            self._P = np.tile(np.diag((self.r ** 2, 1e6)), (2, 1, 1))
+            self._t = t
+            return x, y
+        dt, self._t = t - self._t, t
+
+        F = np.array(((1.0, dt), (0.0, 1.0)))
+        Q = self.q ** 2 * np.array(((dt ** 4 / 4, dt ** 3 / 2),
+                                    (dt ** 3 / 2, dt ** 2)))
+        self._x = self._x @ F.T
+        self._P = F @ self._P @ F.T + Q
+
+        S = self._P[:, 0, 0] + self.r ** 2
+        K = self._P[:, :, 0] / S[:, None]
+        self._x += K * (z - self._x[:, 0])[:, None]
+        self._P -= K[:, :, None] * self._P[:, 0, None, :]
+
+        lead = self.predict_frames * dt
+        px, py = self._x[:, 0] + self._x[:, 1] * lead
+        return float(px), float(py)
+
+
+FILTERS = {
+    "ema"     : ExponentialFilter,
+    "one_euro": OneEuroFilter,
+    "kalman"  : KalmanFilter,
+}
+
+
+def make_filter(name: str, **params) -> CursorFilter:
+    try:
+        return FILTERS[name](**params)
+    except KeyError:
+        raise ValueError(f"Unknown cursor filter: {name}") from None
+
+
+class RecordingFilter(CursorFilter):
+    """Passes everything to another filter and keeps (t, raw x, raw y,
+    filtered x, filtered y) of every call, e.g. for HandMover replays."""
+
+    def __init__(self, inner: CursorFilter):
+        self.inner = inner
+        self.samples = []
+
+    def reset(self) -> None:
+        self.inner.reset()
+        self.samples = []
+
+    def __call__(self, x, y, t):
+        fx, fy = self.inner(x, y, t)
+        self.samples.append((t, x, y, fx, fy))
+        return fx, fy
+
+
+def replay(filt: CursorFilter, times: np.ndarray,
+           measured: np.ndarray) -> np.ndarray:
+    filt.reset()
+    return np.array([filt(x, y, t) for (x, y), t in zip(measured, times)])
+
+
+def filter_metrics(times: np.ndarray, truth: np.ndarray,
+                   output: np.ndarray, clean: Optional[np.ndarray] = None,
+                   max_lag_s: float = 0.25) -> Dict[str, float]:
+    """lag: time shift of the truth that fits the output best,
+    jitter: RMS distance between output and clean, the same filter run on
+    the noise-free measurements, i.e. the tracking noise the filter lets
+    through (only with clean), error: RMS distance to the truth at the
+    same time."""
+    dt = float(np.median(np.diff(times)))
+    best_lag, best_err = 0.0, math.inf
+    for shift in np.arange(-max_lag_s, max_lag_s + dt / 2, dt / 4):
+        shifted = np.stack([np.interp(times - shift, times, truth[:, k])
+                            for k in range(2)], axis=1)
+        err = float(np.sqrt(((output - shifted) ** 2).sum(axis=1).mean()))
+        if err < best_err:
+            best_lag, best_err = float(shift), err
+    rms = lambda d: float(np.sqrt((d ** 2).sum(axis=1).mean()))
+    out = {"lag_ms": best_lag * 1000}
+    if clean is not None:
+        #the acceleration against the shifted truth counted smoothing of the
+        #real motion as jitter too, so laggy filters looked noisy
+        out["jitter_px"] = rms(output - clean)
+    out["error_px"] = rms(output - truth)
+    return out
+
+
+def path_metrics(samples) -> Dict[str, float]:
+    """For a RecordingFilter path without ground truth: lag of the output
+    behind the raw fingertip and the RMS frame-to-frame acceleration of
+    both (the raw one is the tracking noise the filter has to remove)."""
+    arr = np.asarray(samples, dtype=float).reshape(-1, 5)
+    if len(arr) < 4:
+        return {}
+    times, raw, out = arr[:, 0], arr[:, 1:3], arr[:, 3:5]
+    accel = lambda p: float(np.sqrt((np.diff(p, 2, axis=0) ** 2).sum(axis=1).mean()))
+    return {
+        "lag_ms"       : filter_metrics(times, raw, out)["lag_ms"],
+        "jitter_px"    : accel(out),
+        "raw_jitter_px": accel(raw),
+    }
+
+
+def benchmark(filters: Dict[str, CursorFilter], folder: Path,
+              fps: float = 30.0, noise_px: float = 4.0, scale: float = 4.0,
+              latency_frames: float = 1.0,
+              seed: int = 0) -> Dict[str, Dict[str, float]]:
+    """Replays the recorded gestures in folder as fingertip tracks: resampled
+    to the camera rate, scaled up to screen size, delayed by the tracking
+    latency and with gaussian tracking noise added. Returns the mean metrics
+    per filter, measured against the undelayed track."""
+    from dollar.datasets import parse_gesture_file
+
+    rng = np.random.default_rng(seed)
+    tracks = []
+    for path in sorted(Path(folder).glob("*.xml")):
+        raw = parse_gesture_file(path, with_time=True)
+        t = (raw[:, 2] - raw[0, 2]) / 1000.0
+        if len(raw) < 2 or t[-1] <= 0:
+            continue
+        times = np.arange(0.0, t[-1], 1.0 / fps)
+        truth = np.stack([np.interp(times, t, raw[:, k]) for k in range(2)],
+                         axis=1) * scale
+        seen = np.stack([np.interp(times - latency_frames / fps, t, raw[:, k])
+                         for k in range(2)], axis=1) * scale
+        if len(times) > 3:
+            tracks.append((times, truth, seen,
+                           seen + rng.normal(0, noise_px, truth.shape)))
+    if not tracks:
+        raise ValueError(f"No gesture in {folder} is long enough to replay "
+                         f"(needs timestamps and more than 3 frames at {fps:g} fps)")
+
+    results = {}
+    for name, filt in filters.items():
+        rows = [filter_metrics(times, truth, replay(filt, times, measured),
+                               replay(filt, times, seen))
+                for times, truth, seen, measured in tracks]
+        results[name] = {k: float(np.mean([r[k] for r in rows])) for k in rows[0]}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dataset", default="datasets/own_recorded_gestures")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--noise", type=float, default=4.0, help="tracking noise in px")
+    parser.add_argument("--latency", type=float, default=1.0,
+                        help="tracking latency in camera frames")
+    args = parser.parse_args()
+
+    try:
+        res = benchmark({"raw"     : ExponentialFilter(1.0),
+                         "ema"     : ExponentialFilter(),
+                         "one_euro": OneEuroFilter(),
+                         "kalman"  : KalmanFilter()},
+                        Path(args.dataset), args.fps, args.noise,
+                        latency_frames=args.latency)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        sys.exit(1)
+    print(f"{'filter':<10}{'lag ms':>10}{'jitter px':>12}{'error px':>11}")
+    for name, m in res.items():
+        print(f"{name:<10}{m['lag_ms']:>10.1f}{m['jitter_px']:>12.2f}{m['error_px']:>11.2f}")
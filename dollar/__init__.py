@@ -0,0 +1,28 @@
+# display-free $1 recognizer: importing this pulls in numpy only, no pyglet.
+# the GUI (recognizer.GestureWindow) and the game are frontends on top of it,
+# dollar.store and dollar.datasets are imported on demand
+from .core import (ANGLE_PRECISION, ANGLE_RANGE, DIAGONAL, HALF_DIAGONAL,
+                   MATCH_COARSE, MATCH_GOLDEN, MATCH_PROTRACTOR, NUM_POINTS,
+                   ORIGIN, PHI, PRUNE_CHUNK, SQUARE_SIZE, DollarRecognizer,
+                   Result,
+                   Template, batched_distance_at_best_angle, centroid,
+                   distance_at_best_angle, indicative_angle,
+                   normalize_many, normalize_resampled, protractor_distance,
+                   resample, resample_many, rotate_by,
+                   scale_to, translate_to)
+from .streaming import IncrementalRecognizer
+from .templates import gesture_points
+
+__all__ = [
+    "ANGLE_PRECISION", "ANGLE_RANGE", "DIAGONAL", "HALF_DIAGONAL",
+    "MATCH_COARSE", "MATCH_GOLDEN", "MATCH_PROTRACTOR", "NUM_POINTS", "ORIGIN",
+    "PHI",
+    "PRUNE_CHUNK", "SQUARE_SIZE",
+    "DollarRecognizer", "IncrementalRecognizer", "Result", "Template",
+    "batched_distance_at_best_angle",
+    "centroid", "distance_at_best_angle", "indicative_angle",
+    "normalize_many", "normalize_resampled", "protractor_distance",
+    "resample", "resample_many", "rotate_by",
+    "scale_to", "translate_to",
+    "gesture_points",
+]
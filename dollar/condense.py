@@ -0,0 +1,167 @@
+# shrinks a template library to a few medoids per class. Recorded libraries
+# hold many near-duplicates (10 per gesture in own_recorded_gestures), but
+# matching cost grows with every template, so each class is clustered with
+# k-medoids and only as many medoids are kept as leave-one-out accuracy needs.
+#   python -m dollar.condense --datasets wobbrock mid_air --out condensed.npz
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .core import MATCH_GOLDEN, DollarRecognizer, Template
+
+
+@dataclass
+class CondenseStep:
+    templates: int
+    accuracy : float
+
+
+def pairwise_distances(templates: Sequence[Template],
+                       method: str = MATCH_GOLDEN) -> np.ndarray:
+    """(T, T) with row i = template i matched as candidate against all
+    templates, like DollarRecognizer.distance_matrix."""
+    recognizer = DollarRecognizer(window_h=0, method=method)
+    recognizer.add_templates(list(templates))
+    return np.array([recognizer.template_distances(np.asarray(t.points, dtype=float))
+                     for t in templates]).reshape(len(templates), len(templates))
+
+
+def k_medoids(dist: np.ndarray, k: int, max_iter: int = 50) -> np.ndarray:
+    """Indices of k medoids for a symmetric (n, n) distance matrix: greedy
+    build (each step adds the point that lowers the total cost most), then
+    swaps while they still lower it (PAM)."""
+    n = len(dist)
+    if k >= n:
+        return np.arange(n)
+    medoids = [int(np.argmin(dist.sum(axis=1)))]
+    nearest = dist[medoids[0]].copy()
+    for _ in range(1, k):
+        gain = np.maximum(nearest[None, :] - dist, 0.0).sum(axis=1)
+        gain[medoids] = -1.0
+        m = int(np.argmax(gain))
+        medoids.append(m)
+        nearest = np.minimum(nearest, dist[m])
+
+    medoids = np.array(medoids)
+    cost = dist[medoids].min(axis=0).sum()
+    for _ in range(max_iter):
+        improved = False
+        others = np.setdiff1d(np.arange(n), medoids)
+        for slot in range(k):
+            rest = np.delete(medoids, slot)
+            base = dist[rest].min(axis=0) if len(rest) else np.full(n, np.inf)
+            # total cost if medoids[slot] were swapped for each candidate
+            costs = np.minimum(base[None, :], dist[others]).sum(axis=1)
+            best = int(np.argmin(costs))
+            if costs[best] < cost - 1e-9:
+                medoids[slot], cost = others[best], costs[best]
+                others = np.setdiff1d(np.arange(n), medoids)
+                improved = True
+        if not improved:
+            break
+    return np.sort(medoids)
+
+
+def loo_accuracy(dist: np.ndarray, labels: np.ndarray,
+                 keep: np.ndarray) -> Tuple[float, np.ndarray]:
+    """Leave-one-out accuracy when only the templates in keep are used:
+    every template is recognized against keep without itself. Also returns
+    the number of errors per label index."""
+    sub = dist[:, keep].copy()
+    sub[keep, np.arange(len(keep))] = np.inf
+    predicted = labels[keep][np.argmin(sub, axis=1)]
+    wrong = predicted != labels
+    return 1.0 - wrong.mean(), np.bincount(labels[wrong], minlength=labels.max() + 1)
+
+
+def condense(templates: Sequence[Template], tolerance: float = 0.0,
+             method: str = MATCH_GOLDEN, dist: np.ndarray = None
+             ) -> Tuple[List[Template], List[CondenseStep]]:
+    """Starts with one medoid per class and adds one more to the class with
+    the most leave-one-out errors until the accuracy is within tolerance of
+    the full library's. Returns the kept templates and every step on the
+    way (templates vs. accuracy)."""
+    templates = list(templates)
+    if dist is None:
+        dist = pairwise_distances(templates, method)
+    names = list(dict.fromkeys(t.name for t in templates))
+    labels = np.array([names.index(t.name) for t in templates])
+    members = [np.flatnonzero(labels == c) for c in range(len(names))]
+    sym = 0.5 * (dist + dist.T)
+
+    target, _ = loo_accuracy(dist, labels, np.arange(len(templates)))
+    cache: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def medoids(c: int, k: int) -> np.ndarray:
+        if (c, k) not in cache:
+            idx = members[c]
+            cache[c, k] = idx[k_medoids(sym[np.ix_(idx, idx)], k)]
+        return cache[c, k]
+
+    counts = [1] * len(names)
+    steps = []
+    while True:
+        keep = np.sort(np.concatenate([medoids(c, k) for c, k in enumerate(counts)]))
+        acc, errors = loo_accuracy(dist, labels, keep)
+        steps.append(CondenseStep(len(keep), float(acc)))
+        growable = [c for c in range(len(names)) if counts[c] < len(members[c])]
+        if acc >= target - tolerance or not growable:
+            break
+        counts[max(growable, key=lambda c: (errors[c], -counts[c]))] += 1
+    return [templates[i] for i in keep], steps
+
+
+def main() -> None:
+    import argparse
+    import time
+    from pathlib import Path
+
+    from .datasets import DATASET_DIRS, load_dataset
+    from .store import save_templates
+
+    parser = argparse.ArgumentParser(
+        description="Keep a few medoids per gesture class of a template library.")
+    parser.add_argument("--datasets", nargs="+", default=list(DATASET_DIRS),
+                        help="DATASET_DIRS keys or folders with XML gestures")
+    parser.add_argument("--tolerance", type=float, default=0.0,
+                        help="accuracy that may be lost against the full library")
+    parser.add_argument("--method", default=MATCH_GOLDEN)
+    parser.add_argument("--out", type=Path, default=None,
+                        help="write the kept templates as a template store (.npz)")
+    args = parser.parse_args()
+
+    templates = [Template(s.name, s.points, source=s.file)
+                 for key in args.datasets for s in load_dataset(key)]
+    dist = pairwise_distances(templates, args.method)
+    kept, steps = condense(templates, args.tolerance, args.method, dist=dist)
+    names = list(dict.fromkeys(t.name for t in templates))
+    labels = np.array([names.index(t.name) for t in templates])
+    full_acc, _ = loo_accuracy(dist, labels, np.arange(len(templates)))
+
+    timings = {}
+    for label, library in (("full", templates), ("condensed", kept)):
+        recognizer = DollarRecognizer(window_h=0, method=args.method)
+        recognizer.add_templates(library)
+        t0 = time.perf_counter()
+        for t in templates:
+            recognizer.recognize_normalized(np.asarray(t.points, dtype=float))
+        timings[label] = (time.perf_counter() - t0) / len(templates) * 1e3
+
+    #latency per recognition for the full library and the kept one (last row)
+    print(f"{'templates':>10} {'LOO acc':>9} {'ms':>7}")
+    print(f"{len(templates):>10} {full_acc:>9.3f} {timings['full']:>7.2f}  (full)")
+    for i, step in enumerate(steps):
+        ms = f"{timings['condensed']:>7.2f}" if i == len(steps) - 1 else ""
+        print(f"{step.templates:>10} {step.accuracy:>9.3f} {ms}".rstrip())
+    print(f"kept {len(kept)}/{len(templates)} templates")
+
+    if args.out:
+        save_templates(args.out, kept)
+        print(f"written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,542 @@
+#BASIERT AUF https://depts.washington.edu/acelab/proj/dollar/dollar.js
+from __future__ import annotations
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+NUM_POINTS      = 64
+SQUARE_SIZE     = 250.0
+ORIGIN          = (0.0, 0.0)
+DIAGONAL        = math.hypot(SQUARE_SIZE, SQUARE_SIZE)
+HALF_DIAGONAL   = 0.5 * DIAGONAL
+ANGLE_RANGE     = math.radians(45.0)
+ANGLE_PRECISION = math.radians(2.0)
+PHI             = 0.5 * (-1.0 + math.sqrt(5.0))
+PRUNE_CHUNK     = 32
+# below this many candidates recognize_many doesn't start a process pool
+PARALLEL_MIN_CANDIDATES = 200
+
+# bump whenever resample() or the normalization produce different points,
+# template stores (dollar.store) written before are rebuilt then.
+# 2: one-pass resample over the cumulative arc length
+PREPROCESS_VERSION = 2
+
+MATCH_GOLDEN     = "golden"
+MATCH_PROTRACTOR = "protractor"
+MATCH_COARSE     = "coarse_to_fine"
+# MATCH_COARSE: the protractor distance of the COARSE_SHORTLIST templates
+# with the lowest lower bound decides which templates get the golden search
+COARSE_SHORTLIST = 32
+
+def _dist(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    return math.hypot(b[0] - a[0], b[1] - a[1])
+
+
+#same result as the loop in https://depts.washington.edu/acelab/proj/dollar/dollar.js
+#but in one pass: the n equidistant points are interpolated directly on the
+#cumulative arc length instead of inserting them into the point list
+def resample(points: List[Tuple[float, float]],
+             n: int = NUM_POINTS) -> np.ndarray:
+    pts = np.asarray(points, dtype=float).reshape(-1, 2)
+    if not len(pts):
+        return np.empty((0, 2))
+    seg = np.hypot(*np.diff(pts, axis=0).T)
+    keep = np.concatenate(([True], seg > 0))
+    pts, cum = pts[keep], np.concatenate(([0.0], np.cumsum(seg[seg > 0])))
+
+    out = np.empty((n, 2))
+    if cum[-1] == 0:
+        out[:] = pts[0]
+        return out
+    targets = np.linspace(0.0, cum[-1], n)
+    out[:, 0] = np.interp(targets, cum, pts[:, 0])
+    out[:, 1] = np.interp(targets, cum, pts[:, 1])
+    return out
+
+def centroid(pts: List[Tuple[float, float]]) -> Tuple[float, float]:
+    x = sum(p[0] for p in pts) / len(pts)
+    y = sum(p[1] for p in pts) / len(pts)
+    return x, y
+
+
+def indicative_angle(pts: List[Tuple[float, float]]) -> float:
+    c = centroid(pts)
+    return math.atan2(c[1] - pts[0][1], c[0] - pts[0][0])
+
+
+def rotate_by(pts: List[Tuple[float, float]], rad: float
+             ) -> List[Tuple[float, float]]:
+    c = centroid(pts)
+    cos_r, sin_r = math.cos(rad), math.sin(rad)
+    def _rot(p):
+        dx, dy = p[0] - c[0], p[1] - c[1]
+        return (dx * cos_r - dy * sin_r + c[0],
+                dx * sin_r + dy * cos_r + c[1])
+    return [_rot(p) for p in pts]
+
+def _bounding_box(pts: List[Tuple[float, float]]
+                 ) -> Tuple[float, float, float, float]:
+    xs, ys = zip(*pts)
+    return min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)
+
+
+def scale_to(pts: List[Tuple[float, float]],
+             size: float = SQUARE_SIZE) -> List[Tuple[float, float]]:
+    _, _, w, h = _bounding_box(pts)
+    w = w or 1.0
+    h = h or 1.0
+    return [(p[0] * (size / w), p[1] * (size / h)) for p in pts]
+
+
+def translate_to(pts: List[Tuple[float, float]],
+                 target: Tuple[float, float] = ORIGIN
+                ) -> List[Tuple[float, float]]:
+    c = centroid(pts)
+    return [(p[0] + target[0] - c[0], p[1] + target[1] - c[1]) for p in pts]
+
+def _path_distance(a: List[Tuple[float, float]],
+                   b: List[Tuple[float, float]]) -> float:
+    return sum(_dist(p, q) for p, q in zip(a, b)) / len(a)
+
+
+def _distance_at_angle(pts: List[Tuple[float, float]],
+                       tmpl_pts: List[Tuple[float, float]],
+                       rad: float) -> float:
+    return _path_distance(rotate_by(pts, rad), tmpl_pts)
+
+
+def distance_at_best_angle(pts: List[Tuple[float, float]],
+                           tmpl_pts: List[Tuple[float, float]],
+                           a: float, b: float,
+                           thresh: float) -> float:
+    x1 = PHI * a + (1 - PHI) * b
+    f1 = _distance_at_angle(pts, tmpl_pts, x1)
+    x2 = (1 - PHI) * a + PHI * b
+    f2 = _distance_at_angle(pts, tmpl_pts, x2)
+    while abs(b - a) > thresh:
+        if f1 < f2:
+            b, x2, f2 = x2, x1, f1
+            x1 = PHI * a + (1 - PHI) * b
+            f1 = _distance_at_angle(pts, tmpl_pts, x1)
+        else:
+            a, x1, f1 = x1, x2, f2
+            x2 = (1 - PHI) * a + PHI * b
+            f2 = _distance_at_angle(pts, tmpl_pts, x2)
+    return min(f1, f2)
+
+#same golden section search as above, but for all templates at once.
+#pts: (P, 2) candidate, tmpls: (T, P, 2) template matrix -> (T,) distances
+def _batched_distance_at_angle(pts: np.ndarray, tmpls: np.ndarray,
+                               rad: np.ndarray) -> np.ndarray:
+    c = pts.mean(axis=0)
+    dx, dy = pts[:, 0] - c[0], pts[:, 1] - c[1]
+    cos_r, sin_r = np.cos(rad)[:, None], np.sin(rad)[:, None]
+    rx = dx * cos_r - dy * sin_r + c[0]
+    ry = dx * sin_r + dy * cos_r + c[1]
+    return np.hypot(rx - tmpls[..., 0], ry - tmpls[..., 1]).mean(axis=1)
+
+
+def batched_distance_at_best_angle(pts: np.ndarray, tmpls: np.ndarray,
+                                   a: float, b: float,
+                                   thresh: float) -> np.ndarray:
+    a = np.full(len(tmpls), a, dtype=float)
+    b = np.full(len(tmpls), b, dtype=float)
+    x1 = PHI * a + (1 - PHI) * b
+    f1 = _batched_distance_at_angle(pts, tmpls, x1)
+    x2 = (1 - PHI) * a + PHI * b
+    f2 = _batched_distance_at_angle(pts, tmpls, x2)
+    while np.abs(b - a).max() > thresh:
+        left = f1 < f2
+        b = np.where(left, x2, b)
+        a = np.where(left, a, x1)
+        x_new = np.where(left, PHI * a + (1 - PHI) * b,
+                               (1 - PHI) * a + PHI * b)
+        f_new = _batched_distance_at_angle(pts, tmpls, x_new)
+        x1, f1, x2, f2 = (np.where(left, x_new, x2), np.where(left, f_new, f2),
+                          np.where(left, x1, x_new), np.where(left, f1, f_new))
+    return np.minimum(f1, f2)
+
+#protractor (Li 2010): the rotation that best aligns two centered point sets
+#has a closed form, so no search is needed. The angle is clamped to the same
+#range as the golden section search and scored with the usual $1 distance.
+def protractor_distance(pts: np.ndarray, tmpls: np.ndarray,
+                        a: float, b: float) -> np.ndarray:
+    dx = pts[:, 0] - pts[:, 0].mean()
+    dy = pts[:, 1] - pts[:, 1].mean()
+    tc = tmpls - tmpls.mean(axis=1, keepdims=True)
+    dot   = (dx * tc[..., 0] + dy * tc[..., 1]).sum(axis=1)
+    cross = (dx * tc[..., 1] - dy * tc[..., 0]).sum(axis=1)
+    rad = np.clip(np.arctan2(cross, dot), a, b)
+    return _batched_distance_at_angle(pts, tmpls, rad)
+
+
+#rotate_by/scale_to/translate_to in one go for an already resampled array
+def normalize_resampled(pts: np.ndarray,
+                        size: float = SQUARE_SIZE) -> np.ndarray:
+    c = pts.mean(axis=0)
+    rad = -math.atan2(c[1] - pts[0, 1], c[0] - pts[0, 0])
+    d = pts - c
+    out = np.empty_like(pts)
+    out[:, 0] = d[:, 0] * math.cos(rad) - d[:, 1] * math.sin(rad) + c[0]
+    out[:, 1] = d[:, 0] * math.sin(rad) + d[:, 1] * math.cos(rad) + c[1]
+    wh = np.ptp(out, axis=0)
+    wh[wh == 0] = 1.0
+    out *= size / wh
+    out -= out.mean(axis=0)
+    return out
+
+
+#resample() for many strokes in one np.interp call: each stroke's arc length
+#is scaled to 0..1 and shifted by 2*i, which keeps the strokes apart
+def resample_many(strokes: Union[np.ndarray, Sequence[Sequence[Tuple[float, float]]]],
+                  n: int = NUM_POINTS) -> np.ndarray:
+    """(N, P, 2) array or N ragged strokes -> (N, n, 2)"""
+    if isinstance(strokes, np.ndarray) and strokes.ndim == 3:
+        lens = np.full(len(strokes), strokes.shape[1])
+        pts = strokes.reshape(-1, 2).astype(float)
+    else:
+        arrs = [np.asarray(s, dtype=float).reshape(-1, 2) for s in strokes]
+        lens = np.array([len(a) for a in arrs], dtype=int)
+        pts = np.concatenate(arrs) if arrs else np.empty((0, 2))
+    count = len(lens)
+    out = np.empty((count, n, 2))
+    if not count:
+        return out
+    if (lens == 0).any():
+        raise ValueError("Can't resample an empty stroke")
+
+    starts = np.concatenate(([0], np.cumsum(lens)[:-1]))
+    ends = starts + lens - 1
+    seg = np.empty(len(pts))
+    seg[0] = 0.0
+    seg[1:] = np.hypot(*np.diff(pts, axis=0).T)
+    seg[starts] = 0.0
+    cum = np.cumsum(seg)
+    cum -= np.repeat(cum[starts], lens)
+    total = cum[ends]
+
+    flat = total == 0
+    scale = np.where(flat, 1.0, total)
+    row = np.repeat(np.arange(count), lens)
+    xp = cum / np.repeat(scale, lens) + 2.0 * row
+    targets = (np.linspace(0.0, 1.0, n) + 2.0 * np.arange(count)[:, None]).ravel()
+    out[..., 0] = np.interp(targets, xp, pts[:, 0]).reshape(count, n)
+    out[..., 1] = np.interp(targets, xp, pts[:, 1]).reshape(count, n)
+    out[flat] = pts[starts[flat]][:, None, :]
+    return out
+
+
+#normalize_resampled() for a (N, P, 2) stack of resampled strokes
+def normalize_many(pts: np.ndarray, size: float = SQUARE_SIZE) -> np.ndarray:
+    c = pts.mean(axis=1, keepdims=True)
+    rad = -np.arctan2(c[:, 0, 1] - pts[:, 0, 1], c[:, 0, 0] - pts[:, 0, 0])
+    cos_r, sin_r = np.cos(rad)[:, None], np.sin(rad)[:, None]
+    d = pts - c
+    out = np.empty_like(pts)
+    out[..., 0] = d[..., 0] * cos_r - d[..., 1] * sin_r + c[..., 0]
+    out[..., 1] = d[..., 0] * sin_r + d[..., 1] * cos_r + c[..., 1]
+    wh = np.ptp(out, axis=1)
+    wh[wh == 0] = 1.0
+    out *= (size / wh)[:, None, :]
+    out -= out.mean(axis=1, keepdims=True)
+    return out
+
+
+_pool_recognizer: Optional["DollarRecognizer"] = None
+
+
+def _init_pool(recognizer: "DollarRecognizer") -> None:
+    global _pool_recognizer
+    _pool_recognizer = recognizer
+
+
+def _recognize_chunk(candidates: np.ndarray) -> List["Result"]:
+    return [_pool_recognizer.recognize_normalized(c) for c in candidates]
+
+
+def _distances_chunk(candidates: np.ndarray) -> np.ndarray:
+    return np.array([_pool_recognizer.template_distances(c) for c in candidates]
+                    ).reshape(len(candidates), -1)
+
+@dataclass
+class Template:
+    name      : str
+    raw_points: List[Tuple[float, float]]
+    points    : List[Tuple[float, float]] = None
+    source    : str = ""
+
+    def __post_init__(self):
+        #points are only given when loading already normalized templates
+        if self.points is not None:
+            return
+        pts = resample(self.raw_points)
+        pts = rotate_by(pts, -indicative_angle(pts))
+        pts = scale_to(pts)
+        pts = translate_to(pts)
+        self.points = pts
+
+
+@dataclass
+class Result:
+    name    : str
+    score   : float
+    distance: float = math.inf
+
+class DollarRecognizer:
+    def __init__(self, window_h: int, method: str = MATCH_GOLDEN,
+                 coarse_verify: bool = True):
+        if method not in (MATCH_GOLDEN, MATCH_PROTRACTOR, MATCH_COARSE):
+            raise ValueError(f"Unknown matching method: {method}")
+        self.templates: List[Template] = []
+        self.method = method
+        #MATCH_COARSE only: False skips the lower bound check after the
+        #refinement, faster but the best template may differ from MATCH_GOLDEN
+        self.coarse_verify = coarse_verify
+        self._win_h = window_h
+        self._matrix: np.ndarray = None
+        self._class_names: List[str] = []
+        self._class_ids: np.ndarray = None
+        self._radii: np.ndarray = None
+
+    def add_template(self, name: str, pts: List[Tuple[float, float]],
+                     source: str = ""):
+        self.templates.append(Template(name, pts, source=source))
+        self._matrix = None
+
+    def add_templates(self, templates: List[Template]):
+        self.templates.extend(templates)
+        self._matrix = None
+
+    def _template_matrix(self) -> np.ndarray:
+        #(T, NUM_POINTS, 2) array of all normalized templates, rebuilt lazily
+        if self._matrix is None or len(self._matrix) != len(self.templates):
+            self._matrix = np.array([t.points for t in self.templates],
+                                    dtype=float).reshape(-1, NUM_POINTS, 2)
+            names = [t.name for t in self.templates]
+            self._class_names = list(dict.fromkeys(names))
+            index = {name: i for i, name in enumerate(self._class_names)}
+            self._class_ids = np.array([index[n] for n in names], dtype=int)
+            #per point distance to the centroid for the radial lower bound
+            tc = self._matrix - self._matrix.mean(axis=1, keepdims=True)
+            self._radii = np.hypot(tc[..., 0], tc[..., 1])
+        return self._matrix
+
+    def template_matrix(self) -> np.ndarray:
+        """(T, NUM_POINTS, 2) normalized templates in self.templates order,
+        read-only (it is cached until templates are added)."""
+        matrix = self._template_matrix().view()
+        matrix.flags.writeable = False
+        return matrix
+
+    @property
+    def window_h(self) -> int:
+        """Window height for flipping pyglet's y axis in recognize()."""
+        return self._win_h
+
+    @window_h.setter
+    def window_h(self, value: int) -> None:
+        self._win_h = value
+
+    def _lower_bounds(self, pts: np.ndarray) -> np.ndarray:
+        #rotating around the centroid keeps every point's distance to it, so
+        #mean |r_cand - r_tmpl| bounds the distance at ANY angle, for the
+        #golden section search and the protractor angle alike
+        self._template_matrix()
+        r = np.hypot(*(pts - pts.mean(axis=0)).T)
+        return np.abs(self._radii - r).mean(axis=1)
+
+    def _classes(self) -> Tuple[List[str], np.ndarray]:
+        #class names in order of first appearance and the class of each template
+        self._template_matrix()
+        return self._class_names, self._class_ids
+
+    def _distances(self, pts: np.ndarray, tmpls: np.ndarray) -> np.ndarray:
+        #protractor angle or golden section search, MATCH_COARSE refines
+        #with the latter
+        if self.method == MATCH_PROTRACTOR:
+            return protractor_distance(pts, tmpls, -ANGLE_RANGE, ANGLE_RANGE)
+        return batched_distance_at_best_angle(
+            pts, tmpls, -ANGLE_RANGE, ANGLE_RANGE, ANGLE_PRECISION)
+
+    def template_distances(self, pts: np.ndarray) -> np.ndarray:
+        """(T,) distance of a normalized candidate to every template, no pruning."""
+        if not self.templates:
+            return np.empty(0)
+        return self._distances(pts, self._template_matrix())
+
+    def _best_match(self, pts: np.ndarray) -> Tuple[int, float]:
+        matrix = self._template_matrix()
+        if self.method == MATCH_COARSE:
+            return self._coarse_to_fine_match(pts)
+
+        #search templates with the lowest lower bound first and stop as soon
+        #as the rest can't get below the best distance found so far
+        lower = self._lower_bounds(pts)
+        order = np.argsort(lower, kind="stable")
+        best, best_dist = int(order[0]), math.inf
+        for start in range(0, len(order), PRUNE_CHUNK):
+            chunk = order[start:start + PRUNE_CHUNK]
+            chunk = chunk[lower[chunk] < best_dist]
+            if not len(chunk):
+                break
+            dists = self._distances(pts, matrix[chunk])
+            i = int(np.argmin(dists))
+            if dists[i] < best_dist:
+                best, best_dist = int(chunk[i]), float(dists[i])
+        return best, best_dist
+
+    def _coarse_to_fine_match(self, pts: np.ndarray) -> Tuple[int, float]:
+        #coarse: the protractor distance of the COARSE_SHORTLIST templates
+        #with the lowest lower bound estimates the best distance. fine: one
+        #golden section search over every template whose lower bound is
+        #below that estimate. _best_match searches whole PRUNE_CHUNKs instead,
+        #and its cost is mostly per call, not per template.
+        #Templates whose bound is still below the result are checked
+        #afterwards, so it is the same as MATCH_GOLDEN (this is rarely needed).
+        #Saves only 10-15% at the median for noisy strokes at 200-1000
+        #templates, the tail is about the same as MATCH_GOLDEN.
+        matrix = self._template_matrix()
+        lower = self._lower_bounds(pts)
+        shortlist = np.arange(len(matrix))
+        if len(shortlist) > COARSE_SHORTLIST:
+            shortlist = np.argpartition(lower, COARSE_SHORTLIST - 1)[:COARSE_SHORTLIST]
+        estimate = protractor_distance(pts, matrix[shortlist], -ANGLE_RANGE, ANGLE_RANGE)
+        idx = np.flatnonzero(lower < estimate.min())
+        if not len(idx):
+            idx = shortlist[np.argmin(estimate)][None]
+
+        dists = batched_distance_at_best_angle(
+            pts, matrix[idx], -ANGLE_RANGE, ANGLE_RANGE, ANGLE_PRECISION)
+        i = int(np.argmin(dists))
+        best, best_dist = int(idx[i]), float(dists[i])
+        if not self.coarse_verify:
+            return best, best_dist
+        rest = np.flatnonzero(lower < best_dist)
+        rest = rest[~np.isin(rest, idx)]
+        if len(rest):
+            dists = batched_distance_at_best_angle(
+                pts, matrix[rest], -ANGLE_RANGE, ANGLE_RANGE, ANGLE_PRECISION)
+            i = int(np.argmin(dists))
+            if dists[i] < best_dist:
+                best, best_dist = int(rest[i]), float(dists[i])
+        return best, best_dist
+
+    def _class_distances(self, pts: np.ndarray, k: int) -> np.ndarray:
+        #best distance per class, exact for the k closest classes. Like
+        #_best_match, but a template is only skipped once its lower bound
+        #can't beat the k-th best class distance found so far.
+        matrix = self._template_matrix()
+        _, class_ids = self._classes()
+        best = np.full(class_ids.max() + 1, math.inf)
+        if k >= len(best):
+            np.minimum.at(best, class_ids, self.template_distances(pts))
+            return best
+
+        lower = self._lower_bounds(pts)
+        order = np.argsort(lower, kind="stable")
+        for start in range(0, len(order), PRUNE_CHUNK):
+            bound = np.partition(best, k - 1)[k - 1]
+            chunk = order[start:start + PRUNE_CHUNK]
+            chunk = chunk[lower[chunk] < bound]
+            if not len(chunk):
+                break
+            dists = self._distances(pts, matrix[chunk])
+            np.minimum.at(best, class_ids[chunk], dists)
+        return best
+
+    @staticmethod
+    def _check_normalized(pts: np.ndarray) -> None:
+        #the radial lower bound compares distances to each centroid, it only
+        #bounds the real distance when both sit at the origin like templates
+        if pts.shape != (NUM_POINTS, 2):
+            raise ValueError(f"Expected a ({NUM_POINTS}, 2) candidate, got {pts.shape}")
+        if np.abs(pts.mean(axis=0)).max() > 1e-6 * SQUARE_SIZE:
+            raise ValueError("Candidate is not centered on the origin, "
+                             "normalize it like Template does first")
+
+    def recognize_normalized(self, pts: np.ndarray) -> Result:
+        """Best template for a candidate that is already resampled to
+        NUM_POINTS, rotated, scaled and centered on the origin like the
+        templates (Template.points, normalize_resampled, normalize_many).
+        Raises ValueError if it is not centered, the pruning would be wrong."""
+        best_dist = float("inf")
+        best_name = "No match"
+        if self.templates:
+            self._check_normalized(pts)
+            best, best_dist = self._best_match(pts)
+            best_name = self.templates[best].name
+
+        score = 1.0 - best_dist / HALF_DIAGONAL
+        return Result(best_name, score, best_dist)
+
+    def nbest_normalized(self, pts: np.ndarray, k: int = 3) -> List[Result]:
+        """Up to k classes, best first, each with the distance of its closest
+        template. Result[0] is the same as recognize_normalized(), pts has
+        to be normalized the same way."""
+        if not self.templates or k < 1:
+            return []
+        self._check_normalized(pts)
+        names, _ = self._classes()
+        dists = self._class_distances(pts, k)
+        top = np.argsort(dists, kind="stable")[:k]
+        return [Result(names[i], 1.0 - float(dists[i]) / HALF_DIAGONAL,
+                       float(dists[i]))
+                for i in top if np.isfinite(dists[i])]
+
+    def recognize(self, points: List[Tuple[float, float]]) -> Result:
+        #reverse y for pyglet window since it measures from bottom
+        points = [(x, self._win_h - y) for (x, y) in points]
+
+        candidate = Template("", points)
+        return self.recognize_normalized(np.asarray(candidate.points, dtype=float))
+
+    def recognize_nbest(self, points: List[Tuple[float, float]],
+                        k: int = 3) -> List[Result]:
+        points = [(x, self._win_h - y) for (x, y) in points]
+        candidate = Template("", points)
+        return self.nbest_normalized(np.asarray(candidate.points, dtype=float), k)
+
+    def _normalize_batch(self, strokes) -> np.ndarray:
+        #reverse y like recognize()
+        flip = np.array([1.0, -1.0]), np.array([0.0, self._win_h])
+        if isinstance(strokes, np.ndarray) and strokes.ndim == 3:
+            strokes = strokes * flip[0] + flip[1]
+        else:
+            strokes = [np.asarray(s, dtype=float).reshape(-1, 2) * flip[0] + flip[1]
+                       for s in strokes]
+        return normalize_many(resample_many(strokes))
+
+    def _map_batch(self, fn, serial, candidates: np.ndarray,
+                   workers: Optional[int]) -> list:
+        if workers == 1 or len(candidates) < PARALLEL_MIN_CANDIDATES:
+            return [serial(c) for c in candidates]
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_pool,
+                                 initargs=(self,)) as pool:
+            chunks = np.array_split(candidates, 4 * workers)
+            return [r for part in pool.map(fn, chunks) for r in part]
+
+    def recognize_many(self, strokes: Union[np.ndarray, Sequence[Sequence[Tuple[float, float]]]],
+                       workers: Optional[int] = None) -> List[Result]:
+        """recognize() for a (N, P, 2) array or a list of ragged strokes.
+        All candidates are resampled and normalized in one vectorized pass,
+        matching runs in a process pool for larger batches (workers=1
+        disables it, None uses every core)."""
+        return self._map_batch(_recognize_chunk, self.recognize_normalized,
+                               self._normalize_batch(strokes), workers)
+
+    def distance_matrix(self, strokes: Union[np.ndarray, Sequence[Sequence[Tuple[float, float]]]],
+                        workers: Optional[int] = None) -> np.ndarray:
+        """(N, T) distance of every stroke to every template (columns in
+        self.templates order), e.g. for confusion analysis."""
+        candidates = self._normalize_batch(strokes)
+        if not self.templates:
+            return np.empty((len(candidates), 0))
+        rows = self._map_batch(_distances_chunk, self.template_distances,
+                               candidates, workers)
+        return np.array(rows, dtype=float).reshape(len(candidates), len(self.templates))
@@ -0,0 +1,123 @@
+# loader for the XML gesture datasets (wobbrock format, also written by
+# gesture_save_window), with a parsed-points cache keyed by file mtime
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+BASE_DIR  = Path(__file__).parent.parent / "datasets"
+CACHE_DIR = Path(__file__).parent.parent / ".cache"
+DATASET_DIRS = {
+    "mid_air" : BASE_DIR / "own_recorded_gestures",
+    "wobbrock": BASE_DIR / "wobbrock_slow_0",
+}
+# below this many files a process pool costs more than it saves
+PARALLEL_MIN_FILES = 200
+
+
+@dataclass
+class GestureSample:
+    name   : str
+    points : np.ndarray
+    file   : str
+    dataset: str = ""
+
+
+def gesture_label(path: Union[str, Path]) -> str:
+    #same as the notebook: "delete_mark07.xml" -> "delete_mark"
+    return Path(path).stem.rstrip("0123456789").lower()
+
+
+def parse_gesture_file(path: Union[str, Path],
+                       with_time: bool = False) -> np.ndarray:
+    #(N, 2) x, y or with_time (N, 3) x, y, t in ms
+    keys = ("X", "Y", "T") if with_time else ("X", "Y")
+    pts = []
+    for _, elem in ET.iterparse(path, events=("end",)):
+        if elem.tag == "Point":
+            pts.append(tuple(float(elem.attrib[k]) for k in keys))
+            elem.clear()
+    return np.array(pts, dtype=float).reshape(-1, len(keys))
+
+
+def _cache_path(folder: Path) -> Path:
+    digest = hashlib.sha1(str(folder.resolve()).encode("utf-8")).hexdigest()[:12]
+    return CACHE_DIR / f"dataset_{folder.name}_{digest}.pkl"
+
+
+def _read_cache(path: Path) -> Dict[str, Tuple[int, int, np.ndarray]]:
+    try:
+        with open(path, "rb") as fh:
+            return pickle.load(fh)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return {}
+
+
+def _write_cache(path: Path, cache: Dict[str, Tuple[int, int, np.ndarray]]) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as fh:
+            pickle.dump(cache, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def load_dataset(folder: Union[str, Path], dataset: str = "",
+                 workers: Optional[int] = None,
+                 use_cache: bool = True) -> List[GestureSample]:
+    """Parse every *.xml gesture in folder (or a DATASET_DIRS key), sorted by
+    file name. Unchanged files come from the cache, the rest are parsed in a
+    process pool when there are enough of them (workers=1 disables it)."""
+    if str(folder) in DATASET_DIRS:
+        dataset = dataset or str(folder)
+        folder = DATASET_DIRS[str(folder)]
+    folder = Path(folder)
+
+    entries = sorted((e for e in os.scandir(folder)
+                      if e.name.endswith(".xml") and e.is_file()),
+                     key=lambda e: e.name)
+    cache_file = _cache_path(folder)
+    old_cache = _read_cache(cache_file) if use_cache else {}
+
+    cache: Dict[str, Tuple[int, int, np.ndarray]] = {}
+    todo: List[os.DirEntry] = []
+    for entry in entries:
+        st = entry.stat()
+        hit = old_cache.get(entry.name)
+        if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+            cache[entry.name] = hit
+        else:
+            cache[entry.name] = (st.st_mtime_ns, st.st_size, None)
+            todo.append(entry)
+
+    if todo:
+        paths = [e.path for e in todo]
+        if workers != 1 and len(paths) >= PARALLEL_MIN_FILES:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parsed = list(pool.map(parse_gesture_file, paths, chunksize=32))
+        else:
+            parsed = [parse_gesture_file(p) for p in paths]
+        for entry, pts in zip(todo, parsed):
+            mtime, size, _ = cache[entry.name]
+            cache[entry.name] = (mtime, size, pts)
+
+    if use_cache and (todo or len(cache) != len(old_cache)):
+        _write_cache(cache_file, cache)
+
+    return [GestureSample(gesture_label(e.name), cache[e.name][2], e.name, dataset)
+            for e in entries]
+
+
+def add_to_recognizer(recognizer, samples: List[GestureSample]) -> None:
+    for s in samples:
+        recognizer.add_template(s.name, s.points, source=s.file)
@@ -0,0 +1,101 @@
+# cached LSTM input tensors: every dataset parsed, resampled and normalised
+# once into .npy files under .cache/features/<key>/, later runs map them
+# read-only instead of redoing the preprocessing. The key is a hash of the
+# parsed points, file names and labels plus the preprocessing parameters,
+# so new or changed recordings give a new entry.
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+from .datasets import CACHE_DIR, DATASET_DIRS, load_dataset
+from .lstm import LSTM_POINTS, preprocess
+
+FEATURE_DIR = CACHE_DIR / "features"
+# bump when preprocess() changes, old entries are then ignored
+FEATURE_VERSION = 1
+
+
+@dataclass
+class FeatureSet:
+    X       : np.ndarray  # (N, num_points, 2) float32, read-only memmap
+    labels  : np.ndarray  # (N,) gesture names
+    datasets: np.ndarray  # (N,) DATASET_DIRS key of each row
+    files   : np.ndarray  # (N,) xml file names
+    ranges  : Dict[str, Tuple[int, int]]
+    key     : str
+
+    def __len__(self) -> int:
+        return len(self.X)
+
+    def subset(self, dataset: str) -> Tuple[np.ndarray, np.ndarray]:
+        """X and labels of one dataset. Its rows are stored in one block, so
+        these are views into the mapped file, not copies."""
+        start, stop = self.ranges[dataset]
+        return self.X[start:stop], self.labels[start:stop]
+
+
+def _key(samples: Dict[str, list], num_points: int) -> str:
+    digest = hashlib.sha1(json.dumps({"version": FEATURE_VERSION,
+                                      "num_points": num_points}).encode("utf-8"))
+    for dataset, group in samples.items():
+        digest.update(dataset.encode("utf-8"))
+        for s in group:
+            digest.update(f"\0{s.file}\0{s.name}\0{len(s.points)}".encode("utf-8"))
+            digest.update(np.ascontiguousarray(s.points, dtype=np.float64).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _write(folder: Path, samples: Dict[str, list], num_points: int) -> None:
+    #into a temporary folder first, a half written entry is never picked up
+    tmp = folder.with_name(f"{folder.name}.tmp{os.getpid()}")
+    tmp.mkdir(parents=True, exist_ok=True)
+    rows = [s for group in samples.values() for s in group]
+    np.save(tmp / "X.npy", preprocess([s.points for s in rows], num_points))
+    np.save(tmp / "labels.npy", np.array([s.name for s in rows]))
+    np.save(tmp / "datasets.npy", np.array([d for d, g in samples.items() for _ in g]))
+    np.save(tmp / "files.npy", np.array([s.file for s in rows]))
+    ranges, start = {}, 0
+    for dataset, group in samples.items():
+        ranges[dataset] = (start, start + len(group))
+        start += len(group)
+    (tmp / "meta.json").write_text(json.dumps({
+        "version": FEATURE_VERSION, "num_points": num_points, "ranges": ranges,
+    }, indent=1), encoding="utf-8")
+    try:
+        os.replace(tmp, folder)
+    except OSError:
+        # another process wrote the same entry first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def load_features(datasets: Sequence[str] = tuple(DATASET_DIRS),
+                  num_points: int = LSTM_POINTS,
+                  use_cache: bool = True) -> FeatureSet:
+    """Preprocessed features of the given DATASET_DIRS keys, in that order,
+    each sorted by file name like load_dataset. Computed on the first call
+    for this data and num_points, memory-mapped from the cache after that."""
+    samples = {key: load_dataset(key) for key in datasets}
+    key = _key(samples, num_points)
+    folder = FEATURE_DIR / key
+    if not use_cache:
+        shutil.rmtree(folder, ignore_errors=True)
+    if not (folder / "meta.json").exists():
+        _write(folder, samples, num_points)
+
+    meta = json.loads((folder / "meta.json").read_text(encoding="utf-8"))
+    return FeatureSet(
+        X=np.load(folder / "X.npy", mmap_mode="r"),
+        labels=np.load(folder / "labels.npy"),
+        datasets=np.load(folder / "datasets.npy"),
+        files=np.load(folder / "files.npy"),
+        ranges={d: tuple(r) for d, r in meta["ranges"].items()},
+        key=key,
+    )
@@ -0,0 +1,186 @@
+# numpy runtime for the LSTM classifiers trained in the notebook, so the apps
+# can use one without importing tensorflow. export_keras_model() runs in the
+# notebook and writes the weights to a .npz, LstmRecognizer only needs numpy.
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .core import Result, resample_many
+
+LSTM_FORMAT_VERSION = 1
+# same as NUMBER_OF_POINTS_FOR_EACH_GESTURE in the notebook
+LSTM_POINTS = 128
+
+
+def normalise_point_clouds(pts: np.ndarray) -> np.ndarray:
+    """normalisePointCloud from the notebook for a (N, P, 2) stack: centred
+    and divided by the largest absolute coordinate."""
+    out = pts - pts.mean(axis=1, keepdims=True)
+    scale = np.abs(out).max(axis=(1, 2))
+    scale[scale == 0] = 1.0
+    return out / scale[:, None, None]
+
+
+def preprocess(strokes: Union[np.ndarray, Sequence[Sequence[Tuple[float, float]]]],
+               num_points: int = LSTM_POINTS) -> np.ndarray:
+    """Strokes in dataset coordinates (y down) -> (N, num_points, 2) float32,
+    the same features the notebook trains on."""
+    return normalise_point_clouds(resample_many(strokes, num_points)).astype(np.float32)
+
+
+def _quantize(w: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    #symmetric int8 per output column
+    scale = np.abs(w).max(axis=0) / 127.0
+    scale[scale == 0] = 1.0
+    return np.round(w / scale).astype(np.int8), scale.astype(np.float32)
+
+
+def export_keras_model(model, path: Union[str, Path], classes: Sequence[str],
+                       quantize: bool = False) -> None:
+    """Writes the LSTM and Dense weights of a model built by the notebook's
+    makeSimpleLstmModel (Dropout is skipped, it does nothing at inference).
+    classes are the label names in output order (LabelEncoder.classes_).
+    quantize stores the matrices as int8 with a float scale per column."""
+    arrays = {"version": np.array(LSTM_FORMAT_VERSION),
+              "classes": np.array([str(c) for c in classes])}
+    num_lstm = 0
+    dense = None
+    for layer in model.layers:
+        kind = type(layer).__name__
+        config = layer.get_config()
+        if kind == "LSTM":
+            if config.get("recurrent_activation", "sigmoid") != "sigmoid" \
+                    or config.get("activation", "tanh") != "tanh":
+                raise ValueError(f"{layer.name}: only tanh/sigmoid LSTMs are supported")
+            if not config.get("use_bias", True):
+                raise ValueError(f"{layer.name}: LSTM without bias is not supported")
+            weights = dict(zip(("kernel", "recurrent", "bias"), layer.get_weights()))
+            for key, w in weights.items():
+                name = f"lstm{num_lstm}_{key}"
+                if quantize and key != "bias":
+                    arrays[name], arrays[name + "_scale"] = _quantize(w)
+                else:
+                    arrays[name] = w.astype(np.float32)
+            num_lstm += 1
+        elif kind == "Dense":
+            if config.get("activation") != "softmax":
+                raise ValueError(f"{layer.name}: the output layer must be a softmax Dense")
+            dense = layer.get_weights()
+        elif kind not in ("Dropout", "InputLayer"):
+            raise ValueError(f"Can't export layer {layer.name} ({kind})")
+    if not num_lstm or dense is None:
+        raise ValueError("Expected LSTM layers followed by a softmax Dense layer")
+    if dense[0].shape[1] != len(classes):
+        raise ValueError(f"Model has {dense[0].shape[1]} outputs but {len(classes)} classes")
+
+    arrays["num_lstm"] = np.array(num_lstm)
+    arrays["num_points"] = np.array(model.input_shape[1] or LSTM_POINTS)
+    arrays["dense_kernel"] = dense[0].astype(np.float32)
+    arrays["dense_bias"] = dense[1].astype(np.float32)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, **arrays)
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+def lstm_layer(x: np.ndarray, kernel: np.ndarray, recurrent: np.ndarray,
+               bias: np.ndarray, return_sequences: bool) -> np.ndarray:
+    """Keras LSTM forward pass for a (B, T, F) batch. Gates are in Keras
+    order i, f, c, o; the input projection for all timesteps is one matmul."""
+    batch, steps, _ = x.shape
+    units = recurrent.shape[0]
+    xw = x @ kernel + bias
+    h = np.zeros((batch, units), dtype=x.dtype)
+    c = np.zeros_like(h)
+    seq = np.empty((batch, steps, units), dtype=x.dtype) if return_sequences else None
+    for t in range(steps):
+        z = xw[:, t] + h @ recurrent
+        i = _sigmoid(z[:, :units])
+        f = _sigmoid(z[:, units:2 * units])
+        g = np.tanh(z[:, 2 * units:3 * units])
+        o = _sigmoid(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+        if return_sequences:
+            seq[:, t] = h
+    return seq if return_sequences else h
+
+
+class LstmRecognizer:
+    """Same interface as DollarRecognizer (recognize, recognize_many,
+    Result with the softmax probability as score) for an exported model.
+    The weights are loaded on first use."""
+
+    def __init__(self, path: Union[str, Path], window_h: int):
+        self.path = Path(path)
+        self._win_h = window_h
+        self._layers: Optional[List[Tuple[np.ndarray, np.ndarray, np.ndarray]]] = None
+
+    def _load(self) -> None:
+        if self._layers is not None:
+            return
+
+        def weight(data, name):
+            w = data[name]
+            if w.dtype == np.int8:
+                w = w.astype(np.float32) * data[name + "_scale"]
+            return w
+
+        with np.load(self.path) as data:
+            if int(data["version"]) != LSTM_FORMAT_VERSION:
+                raise ValueError(f"{self.path}: unsupported model format {int(data['version'])}")
+            self.classes = [str(c) for c in data["classes"]]
+            self.num_points = int(data["num_points"])
+            self._layers = [(weight(data, f"lstm{i}_kernel"),
+                             weight(data, f"lstm{i}_recurrent"),
+                             data[f"lstm{i}_bias"])
+                            for i in range(int(data["num_lstm"]))]
+            self._dense = (data["dense_kernel"], data["dense_bias"])
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """(N, num_points, 2) preprocessed features -> (N, classes)."""
+        self._load()
+        x = np.asarray(features, dtype=np.float32)
+        for i, (kernel, recurrent, bias) in enumerate(self._layers):
+            x = lstm_layer(x, kernel, recurrent, bias,
+                           return_sequences=i < len(self._layers) - 1)
+        logits = x @ self._dense[0] + self._dense[1]
+        logits -= logits.max(axis=1, keepdims=True)
+        p = np.exp(logits)
+        return p / p.sum(axis=1, keepdims=True)
+
+    def _features(self, strokes) -> np.ndarray:
+        #window coordinates (y up, like DollarRecognizer.recognize) -> features
+        self._load()
+        flip = np.array([1.0, -1.0]), np.array([0.0, self._win_h])
+        if isinstance(strokes, np.ndarray) and strokes.ndim == 3:
+            strokes = strokes * flip[0] + flip[1]
+        else:
+            strokes = [np.asarray(s, dtype=float).reshape(-1, 2) * flip[0] + flip[1]
+                       for s in strokes]
+        return preprocess(strokes, self.num_points)
+
+    def recognize_many(self, strokes, batch_size: int = 256) -> List[Result]:
+        features = self._features(strokes)
+        results = []
+        for start in range(0, len(features), batch_size):
+            proba = self.predict_proba(features[start:start + batch_size])
+            best = proba.argmax(axis=1)
+            results.extend(Result(self.classes[b], float(p[b]))
+                           for b, p in zip(best, proba))
+        return results
+
+    def recognize(self, points: List[Tuple[float, float]]) -> Result:
+        return self.recognize_many([points])[0]
+
+    def recognize_nbest(self, points: List[Tuple[float, float]],
+                        k: int = 3) -> List[Result]:
+        proba = self.predict_proba(self._features([points]))[0]
+        return [Result(self.classes[c], float(proba[c]))
+                for c in np.argsort(-proba)[:k]]
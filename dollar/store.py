@@ -0,0 +1,116 @@
+# on-disk store for already normalized templates, so resample/rotate/scale/
+# translate doesn't have to run again for every template on every start
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from . import core
+from .templates import gesture_points
+
+STORE_VERSION = 1
+CACHE_DIR     = Path(__file__).parent.parent / ".cache"
+BUILTIN_STORE = CACHE_DIR / "builtin_templates.npz"
+
+
+def store_header(key: str = "") -> str:
+    #changes whenever the normalization would produce different points
+    raw = (f"v{STORE_VERSION}|p{core.PREPROCESS_VERSION}|{core.NUM_POINTS}|"
+           f"{core.SQUARE_SIZE}|{key}")
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def save_templates(path: Path, templates: List[core.Template],
+                   key: str = "") -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    points = np.array([t.points for t in templates],
+                      dtype=float).reshape(-1, core.NUM_POINTS, 2)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        np.savez(fh,
+                 header =np.array(store_header(key)),
+                 points =points,
+                 names  =np.array([t.name for t in templates], dtype=str),
+                 sources=np.array([t.source for t in templates], dtype=str))
+    os.replace(tmp, path)
+
+
+def load_templates(path: Path, key: str = "") -> Optional[List[core.Template]]:
+    #returns None if there is no store or it was written with other settings
+    try:
+        with np.load(path) as data:
+            if str(data["header"]) != store_header(key):
+                return None
+            points, names, sources = data["points"], data["names"], data["sources"]
+    except (OSError, KeyError, ValueError):
+        return None
+    return [core.Template(str(name), [], points=pts, source=str(src))
+            for name, pts, src in zip(names, points, sources)]
+
+
+def load_template_store(path: Path) -> List[core.Template]:
+    """Templates of a store written with save_templates (e.g. by
+    python -m dollar.condense --out), for the frontends' --templates.
+    Unlike load_templates a missing or outdated store is an error."""
+    templates = load_templates(path)
+    if not templates:
+        raise ValueError(f"{path} is no template store for this version, "
+                         "write it again (python -m dollar.condense --out)")
+    return templates
+
+
+def cached_templates(path: Path, build: Callable[[], List[core.Template]],
+                     key: str = "") -> List[core.Template]:
+    templates = load_templates(path, key)
+    if templates is None:
+        templates = build()
+        try:
+            save_templates(path, templates, key)
+        except OSError:
+            pass
+    return templates
+
+
+def load_dataset_templates(folder) -> List[core.Template]:
+    """Templates of every XML gesture in folder (or a DATASET_DIRS key),
+    normalized once and cached in a store. The key covers the file names,
+    mtimes and sizes, so changed recordings rebuild it."""
+    from .datasets import DATASET_DIRS, load_dataset
+
+    folder = Path(DATASET_DIRS.get(str(folder), folder))
+    files = sorted((e.name, e.stat().st_mtime_ns, e.stat().st_size)
+                   for e in os.scandir(folder)
+                   if e.name.endswith(".xml") and e.is_file())
+    if not files:
+        raise ValueError(f"No XML gestures in {folder}")
+    key = hashlib.sha1(repr(files).encode("utf-8")).hexdigest()
+    digest = hashlib.sha1(str(folder.resolve()).encode("utf-8")).hexdigest()[:12]
+    return cached_templates(
+        CACHE_DIR / f"templates_{folder.name}_{digest}.npz",
+        lambda: [core.Template(s.name, s.points, source=s.file)
+                 for s in load_dataset(folder)],
+        key,
+    )
+
+
+def load_template_library(spec) -> List[core.Template]:
+    """--templates of the frontends: a template store (.npz) or a folder of
+    XML gestures / DATASET_DIRS key, see load_dataset_templates."""
+    if str(spec).endswith(".npz"):
+        return load_template_store(spec)
+    return load_dataset_templates(spec)
+
+
+def load_builtin_templates() -> List[core.Template]:
+    key = hashlib.sha1(repr(sorted(gesture_points.items())).encode()).hexdigest()
+    return cached_templates(
+        BUILTIN_STORE,
+        lambda: [core.Template(name, pts, source="builtin")
+                 for name, pts in gesture_points.items()],
+        key,
+    )
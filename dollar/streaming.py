@@ -0,0 +1,85 @@
+# point-by-point recognition while a stroke is still being drawn
+from __future__ import annotations
+
+import math
+from typing import Optional
+
+import numpy as np
+
+from .core import (ANGLE_RANGE, HALF_DIAGONAL, NUM_POINTS, DollarRecognizer,
+                   Result, normalize_resampled, protractor_distance)
+
+
+class IncrementalRecognizer:
+    """Collects a stroke point by point (e.g. from on_mouse_drag) with the
+    running arc length, so resampling is one np.interp on the stored
+    lengths. The normalization and the match still run over the whole
+    resampled stroke: the $1 centroid is the one of the resampled points,
+    which changes with every new point."""
+
+    def __init__(self, recognizer: DollarRecognizer,
+                 min_points: int = 10, guess_every: int = 4):
+        self.recognizer  = recognizer
+        self.min_points  = min_points
+        self.guess_every = guess_every
+        self._buf = np.empty((256, 3))  # x, y, arc length up to this point
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self._guess: Result = None
+        self._guess_at = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def length(self) -> float:
+        return float(self._buf[self.count - 1, 2]) if self.count else 0.0
+
+    def add_point(self, x: float, y: float):
+        y = self.recognizer.window_h - y
+        d = 0.0
+        if self.count:
+            px, py, length = self._buf[self.count - 1]
+            d = math.hypot(x - px, y - py)
+            if d == 0:
+                return
+        else:
+            length = 0.0
+        if self.count == len(self._buf):
+            self._buf = np.concatenate((self._buf, np.empty_like(self._buf)))
+        self._buf[self.count] = (x, y, length + d)
+        self.count += 1
+
+    def _normalized(self) -> np.ndarray:
+        buf = self._buf[:self.count]
+        out = np.empty((NUM_POINTS, 2))
+        targets = np.linspace(0.0, buf[-1, 2], NUM_POINTS)
+        out[:, 0] = np.interp(targets, buf[:, 2], buf[:, 0])
+        out[:, 1] = np.interp(targets, buf[:, 2], buf[:, 1])
+        return normalize_resampled(out)
+
+    def partial(self) -> Optional[Result]:
+        """Best guess for the stroke so far, recomputed every guess_every
+        points with the closed form matcher, None while the stroke is short."""
+        if self.count < self.min_points or not self.recognizer.templates:
+            return None
+        if self._guess is None or self.count - self._guess_at >= self.guess_every:
+            dists = protractor_distance(self._normalized(),
+                                        self.recognizer.template_matrix(),
+                                        -ANGLE_RANGE, ANGLE_RANGE)
+            best = int(np.argmin(dists))
+            self._guess = Result(self.recognizer.templates[best].name,
+                                 1.0 - float(dists[best]) / HALF_DIAGONAL)
+            self._guess_at = self.count
+        return self._guess
+
+    def candidate(self) -> Optional[np.ndarray]:
+        """The normalized stroke, e.g. to match it in a RecognitionService."""
+        return self._normalized() if self.count >= 2 else None
+
+    def finish(self) -> Result:
+        if self.count < 2:
+            return Result("No match", float("-inf"))
+        return self.recognizer.recognize_normalized(self._normalized())
@@ -0,0 +1,47 @@
+# the built-in templates, one example per gesture from the $1 paper
+gesture_points = {
+    "rectangle": [
+        (78,149),(78,153),(78,157),(78,160),(79,162),(79,164),(79,167),(79,169),(79,173),(79,178),
+        (79,183),(80,189),(80,193),(80,198),(80,202),(81,208),(81,210),(81,216),(82,222),(82,224),
+        (82,227),(83,229),(83,231),(85,230),(88,232),(90,233),(92,232),(94,233),(99,232),(102,233),
+        (106,233),(109,234),(117,235),(123,236),(126,236),(135,237),(142,238),(145,238),(152,238),
+        (154,239),(165,238),(174,237),(179,236),(186,235),(191,235),(195,233),(197,233),(200,233),
+        (201,235),(201,233),(199,231),(198,226),(198,220),(196,207),(195,195),(195,181),(195,173),
+        (195,163),(194,155),(192,145),(192,143),(192,138),(191,135),(191,133),(191,130),(190,128),
+        (188,129),(186,129),(181,132),(173,131),(162,131),(151,132),(149,132),(138,132),(136,132),
+        (122,131),(120,131),(109,130),(107,130),(90,132),(81,133),(76,133)
+    ],
+    "circle": [
+        (127,141),(124,140),(120,139),(118,139),(116,139),(111,140),(109,141),(104,144),(100,147),
+        (96,152),(93,157),(90,163),(87,169),(85,175),(83,181),(82,190),(82,195),(83,200),(84,205),
+        (88,213),(91,216),(96,219),(103,222),(108,224),(111,224),(120,224),(133,223),(142,222),
+        (152,218),(160,214),(167,210),(173,204),(178,198),(179,196),(182,188),(182,177),(178,167),
+        (170,150),(163,138),(152,130),(143,129),(140,131),(129,136),(126,139)
+    ],
+    "check": [
+        (91,185),(93,185),(95,185),(97,185),(100,188),(102,189),(104,190),(106,193),(108,195),
+        (110,198),(112,201),(114,204),(115,207),(117,210),(118,212),(120,214),(121,217),(122,219),
+        (123,222),(124,224),(126,226),(127,229),(129,231),(130,233),(129,231),(129,228),(129,226),
+        (129,224),(129,221),(129,218),(129,212),(129,208),(130,198),(132,189),(134,182),(137,173),
+        (143,164),(147,157),(151,151),(155,144),(161,137),(165,131),(171,122),(174,118),(176,114),
+        (177,112),(177,114),(175,116),(173,118)
+    ],
+    "delete": [
+        (123,129),(123,131),(124,133),(125,136),(127,140),(129,142),(133,148),(137,154),(143,158),
+        (145,161),(148,164),(153,170),(158,176),(160,178),(164,183),(168,188),(171,191),(175,196),
+        (178,200),(180,202),(181,205),(184,208),(186,210),(187,213),(188,215),(186,212),(183,211),
+        (177,208),(169,206),(162,205),(154,207),(145,209),(137,210),(129,214),(122,217),(118,218),
+        (111,221),(109,222),(110,219),(112,217),(118,209),(120,207),(128,196),(135,187),(138,183),
+        (148,167),(157,153),(163,145),(165,142),(172,133),(177,127),(179,127),(180,125)
+    ],
+    "pigtail": [
+        (81,219),(84,218),(86,220),(88,220),(90,220),(92,219),(95,220),(97,219),(99,220),(102,218),
+        (105,217),(107,216),(110,216),(113,214),(116,212),(118,210),(121,208),(124,205),(126,202),
+        (129,199),(132,196),(136,191),(139,187),(142,182),(144,179),(146,174),(148,170),(149,168),
+        (151,162),(152,160),(152,157),(152,155),(152,151),(152,149),(152,146),(149,142),(148,139),
+        (145,137),(141,135),(139,135),(134,136),(130,140),(128,142),(126,145),(122,150),(119,158),
+        (117,163),(115,170),(114,175),(117,184),(120,190),(125,199),(129,203),(133,208),(138,213),
+        (145,215),(155,218),(164,219),(166,219),(177,219),(182,218),(192,216),(196,213),(199,212),
+        (201,211)
+    ],
+}
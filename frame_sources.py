@@ -0,0 +1,146 @@
+# where HandMover gets its frames from: the webcam, a recorded video or a
+# recorded landmark stream (no camera and no MediaPipe needed for the last one)
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Union
+
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+
+@dataclass
+class Frame:
+    stamp    : float
+    image    : Optional[np.ndarray] = None
+    # (21, 3) normalized MediaPipe landmarks, already mirrored like the preview
+    landmarks: Optional[np.ndarray] = None
+    # replays: when the frame was recorded, so the cursor filter sees the
+    # original timing even if the replay runs faster
+    captured : Optional[float] = None
+
+
+class FrameSource:
+    # camera images are mirrored before inference so moving the hand right
+    # moves the cursor right
+    mirror = False
+    # live sources drop frames a slow consumer can't keep up with, replays
+    # that run as fast as possible wait instead so every frame is measured
+    drop_frames = True
+
+    def __init__(self):
+        self.exhausted = False
+
+    def read(self) -> Optional[Frame]:
+        """Next frame, or None if there was none (check exhausted)."""
+        raise NotImplementedError
+
+    def release(self) -> None:
+        pass
+
+
+class CameraSource(FrameSource):
+    mirror = True
+
+    def __init__(self, index: int = 0, width: int = 1280, height: int = 960):
+        super().__init__()
+        import cv2
+        self._cap = cv2.VideoCapture(index, cv2.CAP_DSHOW)
+        if not self._cap.isOpened():
+            raise RuntimeError("No webcam found")
+        self._cap.set(cv2.CAP_PROP_FRAME_WIDTH,  width)
+        self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+    def read(self) -> Optional[Frame]:
+        ok, image = self._cap.read()
+        return Frame(time.perf_counter(), image) if ok else None
+
+    def release(self) -> None:
+        self._cap.release()
+
+
+class _Pacer:
+    #sleeps so that recorded timestamps are replayed at their original speed
+    def __init__(self, realtime: bool):
+        self.realtime = realtime
+        self._start: Optional[float] = None
+
+    def wait(self, t: float) -> None:
+        if not self.realtime:
+            return
+        now = time.perf_counter()
+        if self._start is None:
+            self._start = now - t
+        delay = self._start + t - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class VideoFileSource(FrameSource):
+    mirror = True
+
+    def __init__(self, path: Union[str, Path], realtime: bool = True,
+                 mirror: bool = True):
+        super().__init__()
+        import cv2
+        self._cap = cv2.VideoCapture(str(path))
+        if not self._cap.isOpened():
+            raise RuntimeError(f"Can't open video {path}")
+        self.mirror = mirror
+        self.drop_frames = realtime
+        self._fps = self._cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self._index = 0
+        self._pacer = _Pacer(realtime)
+
+    def read(self) -> Optional[Frame]:
+        ok, image = self._cap.read()
+        if not ok:
+            self.exhausted = True
+            return None
+        self._pacer.wait(self._index / self._fps)
+        self._index += 1
+        return Frame(time.perf_counter(), image)
+
+    def release(self) -> None:
+        self._cap.release()
+
+
+class LandmarkReplaySource(FrameSource):
+    """Replays a file written by save_landmarks(). Frames without a hand are
+    stored as NaN and come out with landmarks=None."""
+
+    def __init__(self, path: Union[str, Path], realtime: bool = True):
+        super().__init__()
+        with np.load(path) as data:
+            self._times     = data["t"]
+            self._landmarks = data["landmarks"]
+        self.drop_frames = realtime
+        self._index = 0
+        self._pacer = _Pacer(realtime)
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def read(self) -> Optional[Frame]:
+        if self._index >= len(self._times):
+            self.exhausted = True
+            return None
+        i = self._index
+        self._index += 1
+        self._pacer.wait(float(self._times[i] - self._times[0]))
+        lms = self._landmarks[i]
+        return Frame(time.perf_counter(),
+                     landmarks=None if np.isnan(lms).any() else lms,
+                     captured=float(self._times[i]))
+
+
+def save_landmarks(path: Union[str, Path], stamps: List[float],
+                   landmarks: List[Optional[np.ndarray]]) -> None:
+    arr = np.full((len(landmarks), NUM_LANDMARKS, 3), np.nan)
+    for i, lms in enumerate(landmarks):
+        if lms is not None:
+            arr[i] = lms
+    np.savez_compressed(path, t=np.asarray(stamps, dtype=float), landmarks=arr)
@@ -4,30 +4,27 @@ from __future__ import annotations
 import math
 import random
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
 import pyglet
 from pyglet.window import key, mouse
-from pyglet import shapes
-
-from pynput.mouse import Button
 
+from comet_field import CometField
+from point_channel import PointChannel
+from stroke_renderer import StrokeRenderer
 from pointing_input import HandMover, HandState
-_hand_state = HandState()
-_hand_mover = HandMover(_hand_state)
+_hand_state   = HandState()
+_hand_channel = PointChannel()
+_hand_mover   = HandMover(_hand_state, channel=_hand_channel, move_cursor=False)
 _hand_mover.start()
 
 import recognizer as rz
+from recognition_service import RecognitionService
+from dollar.store import load_builtin_templates, load_template_library
+#templates are added in __main__, the built-in ones or --templates
 _recognizer = rz.DollarRecognizer(window_h=1280)
-for name, points in rz.gesture_points.items():
-    _recognizer.add_template(name, points)
-
-
-def recognize_shape(points: List[Tuple[float, float]], *, thr: float = 0.7
-                    ) -> Optional[str]:
-    result = _recognizer.recognize(points)
-    return result.name if result.score >= thr else None
 
+RECOGNITION_THRESHOLD = 0.7
 
 ASSET_DIR = Path(__file__).with_suffix("").parent / "assets"
 WINDOW_W, WINDOW_H = 1280, 1280
@@ -36,6 +33,10 @@ EARTH_RADIUS_PX = 64
 SPAWN_EVERY = 3.0
 HIT_DISTANCE = 300
 SHAPES = ["rectangle", "circle", "delete", "pigtail", "check"]
+# the recorded datasets call the delete gesture "delete_mark"
+SHAPE_ALIASES = {"delete_mark": "delete"}
+LABEL_COLOR  = (255, 230, 130, 255)
+TARGET_COLOR = (90, 255, 120, 255)
 
 pyglet.resource.path = [str(ASSET_DIR)]
 pyglet.resource.reindex()
@@ -55,11 +56,38 @@ BACKGROUND_MUSIC_PLAYER.play()
 
 
 class Comet:
-    def __init__(self, batch: pyglet.graphics.Batch, shape: str):
+    """Sprite, label and explosion frames are created once, spawn() and
+    recycle() only move and show/hide them, see CometPool. Position and
+    velocity live in the CometField while the comet is flying."""
+
+    def __init__(self, batch: pyglet.graphics.Batch, field: CometField, shape: str):
         self.shape  = shape
         self.batch  = batch
+        self.field  = field
+        self.slot: Optional[int] = None
+        self.x = self.y = 0.0
         self.sprite = pyglet.sprite.Sprite(COMET_IMG, batch=batch)
 
+        self.label = pyglet.text.Label(
+            shape,
+            font_name="Arial",
+            font_size=22,
+            anchor_x="center",
+            anchor_y="center",
+            color=LABEL_COLOR,
+            batch=batch,
+        )
+
+        self.explosion_frames = [pyglet.sprite.Sprite(img, batch=batch)
+                                 for img in EXPLOSION_FRAMES]
+        self.is_targeted = False
+        self.recycle()
+
+    def spawn(self, shape: str) -> None:
+        if shape != self.shape:
+            self.shape = shape
+            self.label.text = shape
+
         side = random.choice(("left", "right", "top", "bottom"))
         if side == "left":
             self.x, self.y = -self.sprite.width, random.uniform(0, WINDOW_H)
@@ -71,57 +99,55 @@ class Comet:
             self.x, self.y = random.uniform(0, WINDOW_W), -self.sprite.height
 
         dx, dy = WINDOW_W / 2 - self.x, WINDOW_H / 2 - self.y
-        length = math.hypot(dx, dy)
-        self.vx, self.vy = dx / length, dy / length
-        self.speed = random.uniform(40, 90)
+        speed = random.uniform(40, 90) / math.hypot(dx, dy)
+        self.slot = self.field.add(shape, self.x, self.y, dx * speed, dy * speed,
+                                   owner=self)
 
         self.sprite.update(x=self.x, y=self.y)
-
-        self.label = pyglet.text.Label(
-            shape,
-            font_name="Arial",
-            font_size=22,
-            anchor_x="center",
-            anchor_y="center",
-            x=self.x + self.sprite.width * 0.5,
-            y=self.y + self.sprite.height * 0.5,
-            color=(255, 230, 130, 255),
-            batch=batch,
-        )
-
-        self.explosion_frames = [pyglet.sprite.Sprite(img, batch=batch)
-                                 for img in EXPLOSION_FRAMES]
+        self.label.position = (self.x + self.sprite.width * 0.5,
+                               self.y + self.sprite.height * 0.5, 0)
+        self.sprite.visible = True
+        self.label.visible  = True
+
+    def recycle(self) -> None:
+        if self.slot is not None:
+            self.field.remove(self.slot)
+            self.slot = None
+        self.sprite.visible = False
+        self.label.visible  = False
         for sprite in self.explosion_frames:
             sprite.visible = False
+        self.set_targeted(False)
         self.is_exploding = False
         self._elapsed_explosion_time = 0.0
 
+    def set_targeted(self, targeted: bool) -> None:
+        if targeted != self.is_targeted:
+            self.is_targeted = targeted
+            self.label.color = TARGET_COLOR if targeted else LABEL_COLOR
+
     def update(self, delta_time: float) -> bool:
+        """Called after CometField.step(), False once the explosion is over."""
         if self.is_exploding:
             self._elapsed_explosion_time += delta_time
             frame_index = int(self._elapsed_explosion_time / 0.10)
             if frame_index >= len(self.explosion_frames):
-                for sprite in self.explosion_frames:
-                    sprite.delete()
-                self.sprite.delete()
-                self.label.delete()
                 return False
 
             for idx, sprite in enumerate(self.explosion_frames):
                 sprite.visible = idx == frame_index
             return True
 
-        self.x += self.vx * self.speed * delta_time
-        self.y += self.vy * self.speed * delta_time
+        self.x, self.y = self.field.pos[self.slot]
         self.sprite.update(x=self.x, y=self.y)
-        self.label.x = self.x + self.sprite.width * 0.5
-        self.label.y = self.y + self.sprite.height * 0.5
+        self.label.position = (self.x + self.sprite.width * 0.5,
+                               self.y + self.sprite.height * 0.5, 0)
         return True
 
-    def distance_to_earth(self) -> float:
-        return math.hypot(self.x - WINDOW_W / 2, self.y - WINDOW_H / 2)
-
     def blast(self):
+        # exploding comets stop moving and can't be targeted or hit the earth
+        self.field.remove(self.slot)
+        self.slot = None
         self.is_exploding = True
         self.sprite.visible = False
         self.label.visible = False
@@ -132,10 +158,36 @@ class Comet:
         EXPLOSION_SOUND_SRC.play()
 
 
-class GameWindow(pyglet.window.Window):
+class CometPool:
+    """Preallocated comets, free ones are kept per shape so a reused comet
+    usually doesn't even need a new label text."""
+
+    def __init__(self, batch: pyglet.graphics.Batch, field: CometField,
+                 per_shape: int = 4):
+        self.batch = batch
+        self.field = field
+        self._free: Dict[str, List[Comet]] = {
+            shape: [Comet(batch, field, shape) for _ in range(per_shape)]
+            for shape in SHAPES
+        }
+
+    def acquire(self, shape: str) -> Comet:
+        free = self._free.get(shape)
+        if not free:
+            free = max(self._free.values(), key=len)
+        comet = free.pop() if free else Comet(self.batch, self.field, shape)
+        comet.spawn(shape)
+        return comet
+
+    def release(self, comet: Comet) -> None:
+        comet.recycle()
+        self._free.setdefault(comet.shape, []).append(comet)
+
+
+class GameWindow(rz.HandStrokeInput, pyglet.window.Window):
     def __init__(self):
         super().__init__(WINDOW_W, WINDOW_H, "Shape Defender", resizable=False)
-        globals()["_recognizer"]._win_h = self.height
+        _recognizer.window_h = self.height
 
         self.background_img = pyglet.resource.image("spacebackground.png")
         self.background_sprite = pyglet.sprite.Sprite(self.background_img)
@@ -154,7 +206,10 @@ class GameWindow(pyglet.window.Window):
         )
         self._reset_earth_sprite()
 
+        self.comet_field = CometField(SHAPES, (WINDOW_W / 2, WINDOW_H / 2), HIT_DISTANCE)
+        self.comet_pool = CometPool(self.batch, self.comet_field)
         self.comets: List[Comet] = []
+        self._target: Optional[Comet] = None
         self.score = 0
         self.game_over = False
 
@@ -169,6 +224,10 @@ class GameWindow(pyglet.window.Window):
 
         self.draw_points: List[Tuple[float, float]] = []
         self.is_drawing = False
+        self._stroke = rz.IncrementalRecognizer(_recognizer)
+        self._recognition = RecognitionService(_recognizer)
+        self._stroke_lines = StrokeRenderer(thickness=3, color=(255, 255, 255))
+        self.attach_hand(_hand_channel, self.batch)
 
         pyglet.clock.schedule_interval(self._spawn_comet, SPAWN_EVERY)
         pyglet.clock.schedule_interval(self._update_world, 1 / FPS)
@@ -181,18 +240,26 @@ class GameWindow(pyglet.window.Window):
 
     def _spawn_comet(self, _dt: float) -> None:
         if not self.game_over:
-            self.comets.append(Comet(self.batch, random.choice(SHAPES)))
+            self.comets.append(self.comet_pool.acquire(random.choice(SHAPES)))
 
     def _update_world(self, delta_time: float) -> None:
         if self.game_over:
             return
 
-        for comet in self.comets[:]:
-            if not comet.update(delta_time):
-                self.comets.remove(comet)
-                continue
-            if not comet.is_exploding and comet.distance_to_earth() < EARTH_RADIUS_PX:
-                self._trigger_game_over()
+        hits = self.comet_field.step(delta_time, EARTH_RADIUS_PX)
+
+        alive = []
+        for comet in self.comets:
+            if comet.update(delta_time):
+                alive.append(comet)
+            else:
+                if comet is self._target:
+                    self._target = None
+                self.comet_pool.release(comet)
+        self.comets = alive
+
+        if len(hits):
+            self._trigger_game_over()
 
         self.score_label.text = f"Score: {self.score}"
 
@@ -217,11 +284,9 @@ class GameWindow(pyglet.window.Window):
         )
 
     def _restart_game(self) -> None:
+        self._set_target(None)
         for comet in self.comets:
-            comet.sprite.delete()
-            comet.label.delete()
-            for sprite in comet.explosion_frames:
-                sprite.delete()
+            self.comet_pool.release(comet)
         self.comets.clear()
 
         if self.game_over_label is not None:
@@ -239,58 +304,75 @@ class GameWindow(pyglet.window.Window):
         if button == mouse.LEFT and not self.game_over:
             self.is_drawing = True
             self.draw_points = [(x, y)]
+            self._stroke.reset()
+            self._stroke.add_point(x, y)
+            self._stroke_lines.reset()
+            self._stroke_lines.add_point(x, y)
 
     def on_mouse_drag(self, x: float, y: float, _dx, _dy, buttons, _mods):
         if self.is_drawing and buttons & mouse.LEFT:
             self.draw_points.append((x, y))
+            self._stroke.add_point(x, y)
+            self._stroke_lines.add_point(x, y)
+            self._highlight_targets(x, y)
+
+    def _closest_comet(self, shape_name: str, x: float, y: float
+                       ) -> Optional[Comet]:
+        return self.comet_field.nearest(shape_name, x, y)
+
+    def _set_target(self, target: Optional[Comet]) -> None:
+        if target is self._target:
+            return
+        if self._target is not None:
+            self._target.set_targeted(False)
+        if target is not None:
+            target.set_targeted(True)
+        self._target = target
+
+    def _highlight_targets(self, x: float, y: float) -> None:
+        guess = self._stroke.partial()
+        target = None
+        if guess is not None and guess.score >= RECOGNITION_THRESHOLD:
+            target = self._closest_comet(guess.name, x, y)
+        self._set_target(target)
 
     def on_mouse_release(self, x: float, y: float, button: int, _mods):
         if button != mouse.LEFT or not self.is_drawing:
             return
         self.is_drawing = False
+        self._stroke_lines.reset()
+        self._set_target(None)
 
         if len(self.draw_points) < 10:
             self.draw_points.clear()
             return
 
-        shape_name = recognize_shape(self.draw_points)
-        if shape_name is None:
-            self.draw_points.clear()
-            return
-
-        closest: Optional[Tuple[Comet, float]] = None
-        for comet in self.comets:
-            if comet.shape != shape_name or comet.is_exploding:
-                continue
-            distance = math.hypot(comet.x - x, comet.y - y)
-            if distance < HIT_DISTANCE and (closest is None or distance < closest[1]):
-                closest = (comet, distance)
-
-        if closest:
-            closest[0].blast()
-            self.score += 1
-
+        candidate = self._stroke.candidate()
+        if candidate is not None:
+            self._recognition.submit_nbest(
+                candidate, len(SHAPES), lambda results: self._on_recognized(results, x, y))
         self.draw_points.clear()
 
-    @staticmethod
-    def _draw_polyline(points: List[Tuple[float, float]]):
-        for (x1, y1), (x2, y2) in zip(points, points[1:]):
-            shapes.Line(
-                x1,
-                y1,
-                x2,
-                y2,
-                thickness=3,
-                color=(255, 255, 255),
-                batch=None,
-            ).draw()
+    def _on_recognized(self, results: List[rz.Result], x: float, y: float) -> None:
+        #best class first; if no comet of that shape is in range, a runner-up
+        #that is still above the threshold may hit one
+        if self.game_over:
+            return
+        for result in results:
+            if result.score < RECOGNITION_THRESHOLD:
+                return
+            closest = self._closest_comet(result.name, x, y)
+            if closest:
+                closest.blast()
+                self.score += 1
+                return
 
     def on_draw(self):
         self.clear()
         self.background_sprite.draw()
         self.batch.draw()
-        if self.is_drawing and len(self.draw_points) > 1:
-            self._draw_polyline(self.draw_points)
+        if self.is_drawing:
+            self._stroke_lines.draw()
 
     def on_key_press(self, symbol: int, _mods):
         if symbol == key.ESCAPE:
@@ -298,18 +380,44 @@ class GameWindow(pyglet.window.Window):
         elif symbol == key.R and self.game_over:
             self._restart_game()
         elif symbol == key.SPACE: #key.D
-            if _hand_mover is not None:
-                _hand_mover._mouse.press(Button.left)
+            self.pen_down()
 
     def on_key_release(self, symbol: int, _mods):
-        if symbol == key.SPACE and _hand_mover is not None:
-            _hand_mover._mouse.release(Button.left)
+        if symbol == key.SPACE:
+            self.pen_up()
+
+def load_shape_templates(path: str) -> List[rz.Template]:
+    #a template library with the class names mapped to SHAPES, every shape
+    #needs templates or its comets could never be shot down
+    templates = load_template_library(path)
+    for template in templates:
+        template.name = SHAPE_ALIASES.get(template.name, template.name)
+    missing = set(SHAPES) - {t.name for t in templates}
+    if missing:
+        raise ValueError(f"{path} has no templates for {', '.join(sorted(missing))}")
+    return templates
+
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Shoot comets down with gestures.")
+    parser.add_argument("--templates", default=None, metavar="STORE.npz|FOLDER",
+                        help="$1 templates from a store (e.g. written by "
+                             "python -m dollar.condense --out) or a folder of "
+                             "XML gestures / dataset key, cached after the first start")
+    args = parser.parse_args()
+    _recognizer.add_templates(load_shape_templates(args.templates) if args.templates
+                              else load_builtin_templates())
+
+    #keep a reference: once run() returns the closed window is no longer
+    #in pyglet.app.windows
+    window = None
     try:
-        GameWindow()
+        window = GameWindow()
         pyglet.app.run()
     finally:
+        if window is not None:
+            window._recognition.shutdown()
         if _hand_mover is not None:
             _hand_mover.running = False
             _hand_mover.join(timeout=2.0)
@@ -40,22 +40,15 @@ class _SaveGestureWindow(recognizer.GestureWindow):
             self._drawing_start = time.perf_counter()
             self._raw_points.append((x, y, 0))
             self.points.append((x, y))
+            self.stroke.add_point(x, y)
             self.label.text = "Drawing..."
 
     def on_mouse_drag(self, x, y, dx, dy, buttons, modifiers):
         if buttons & mouse.LEFT:
             now = int((time.perf_counter() - self._drawing_start) * 1000)
-            last = self.points[-1]
             self.points.append((x, y))
             self._raw_points.append((x, y, now))
-            self.lines.append(
-                pyglet.shapes.Line(
-                    last[0], last[1], x, y,
-                    recognizer.LINE_W,
-                    color=(60, 190, 255),
-                    batch=self.batch,
-                )
-            )
+            self.stroke.add_point(x, y)
 
     def on_mouse_release(self, x, y, button, modifiers):
         if button == mouse.LEFT and len(self.points) > 10:
@@ -63,10 +56,8 @@ class _SaveGestureWindow(recognizer.GestureWindow):
             self._raw_points.append((x, y, now))
             self._last_points = self._raw_points.copy()
 
-            res = self.recogniser.recognize(self.points)
-            if res.score < 0.8:
-                res.name = "No match"
-            self.label.text = f"{res.name} (score = {res.score:.2f})"
+            self.label.text = "Recognizing..."
+            self.recognition.submit(self.points, self._show_result)
 
             self.points.clear()
             self._raw_points.clear()
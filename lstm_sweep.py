@@ -0,0 +1,428 @@
+# trains the notebook's LSTM grid (LSTM_SETTINGS_LIST on both datasets)
+# outside jupyter. Configs run in parallel worker processes with a fixed
+# number of threads each, every trained model is cached under a hash of its
+# config and training data, an interrupted sweep resumes from the last
+# finished epoch, and configs that lag behind the rest of the grid are
+# stopped early (median stopping rule on val_accuracy).
+#   python lstm_sweep.py --workers 4 --threads 2
+#   python lstm_sweep.py --datasets wobbrock --no-prune
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from dollar.datasets import CACHE_DIR, DATASET_DIRS
+from dollar.features import load_features
+from dollar.lstm import LSTM_POINTS, export_keras_model
+
+SWEEP_DIR = CACHE_DIR / "sweep"
+
+# same grid as the notebook
+LSTM_SETTINGS_LIST = [
+    dict(number_of_hidden_units=256, how_many_lstm_layers=32, dropout_fraction_between_layers=0),
+    dict(number_of_hidden_units=128, how_many_lstm_layers=32, dropout_fraction_between_layers=0),
+    dict(number_of_hidden_units=128, how_many_lstm_layers=24, dropout_fraction_between_layers=0),
+    dict(number_of_hidden_units=128, how_many_lstm_layers=20, dropout_fraction_between_layers=0),
+    dict(number_of_hidden_units=128, how_many_lstm_layers=16, dropout_fraction_between_layers=0),
+    dict(number_of_hidden_units=128, how_many_lstm_layers=14, dropout_fraction_between_layers=0),
+    dict(number_of_hidden_units=128, how_many_lstm_layers=12, dropout_fraction_between_layers=0),
+    dict(number_of_hidden_units=128, how_many_lstm_layers=10, dropout_fraction_between_layers=0),
+    dict(number_of_hidden_units=128, how_many_lstm_layers=8, dropout_fraction_between_layers=0),
+    dict(number_of_hidden_units=128, how_many_lstm_layers=4, dropout_fraction_between_layers=0),
+    dict(number_of_hidden_units=128, how_many_lstm_layers=3, dropout_fraction_between_layers=0),
+    dict(number_of_hidden_units=64, how_many_lstm_layers=3, dropout_fraction_between_layers=0),
+    dict(number_of_hidden_units=32, how_many_lstm_layers=2, dropout_fraction_between_layers=0),
+    dict(number_of_hidden_units=16, how_many_lstm_layers=10, dropout_fraction_between_layers=0),
+    dict(number_of_hidden_units=16, how_many_lstm_layers=2, dropout_fraction_between_layers=0),
+    dict(number_of_hidden_units=16, how_many_lstm_layers=1, dropout_fraction_between_layers=0),
+]
+
+STATUS_DONE    = "done"     # ran all epochs
+STATUS_STOPPED = "stopped"  # no val_accuracy gain for `patience` epochs
+STATUS_PRUNED  = "pruned"   # behind the median of the other configs
+
+
+@dataclass
+class TrainSettings:
+    # the notebook's fit() arguments; all of them go into the cache key
+    epochs          : int   = 80
+    batch_size      : int   = 32
+    validation_split: float = 0.15
+    patience        : int   = 6
+    test_size       : float = 0.20
+    seed            : int   = 42
+    num_points      : int   = LSTM_POINTS
+
+
+@dataclass
+class PruneSettings:
+    # not part of the cache key: a pruned config is resumed from its
+    # checkpoint when the sweep runs again without pruning
+    enabled  : bool = True
+    after    : int  = 10
+    min_peers: int  = 3
+
+
+@dataclass
+class SweepJob:
+    dataset : str
+    config  : Dict[str, float]
+    key     : str
+    group   : str
+    cost    : float = 0.0
+    metrics : Optional[dict] = field(default=None, repr=False)
+
+    @property
+    def name(self) -> str:
+        c = self.config
+        name = f"Lstm_h{c['number_of_hidden_units']}_L{c['how_many_lstm_layers']}"
+        if c.get("dropout_fraction_between_layers"):
+            name += f"_d{c['dropout_fraction_between_layers']}"
+        return name
+
+    @property
+    def dir(self) -> Path:
+        return SWEEP_DIR / f"{self.dataset}_{self.key}"
+
+
+def _digest(obj) -> str:
+    return hashlib.sha1(json.dumps(obj, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def _read_json(path: Path) -> Optional[dict]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: Path, obj: dict) -> None:
+    #atomic, a worker killed mid-write must not leave a broken file behind
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(obj, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def load_splits(datasets: Sequence[str], settings: TrainSettings
+                ) -> Tuple[List[str], Dict[str, Tuple[np.ndarray, ...]]]:
+    """Class names (LabelEncoder order over all datasets, like the notebook)
+    and X_train, y_train, X_test, y_test per dataset with the notebook's
+    stratified split."""
+    from sklearn.model_selection import train_test_split
+
+    features = load_features(list(DATASET_DIRS), settings.num_points)
+    classes = sorted({str(label) for label in features.labels})
+    splits = {}
+    for key in datasets:
+        X, y = features.subset(key)
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=settings.test_size, stratify=y,
+            random_state=settings.seed)
+        splits[key] = (X_train, y_train, X_test, y_test)
+    return classes, splits
+
+
+def make_jobs(grid: Sequence[dict], classes: Sequence[str],
+              splits: Dict[str, Tuple[np.ndarray, ...]],
+              settings: TrainSettings) -> List[SweepJob]:
+    jobs = []
+    for dataset, (X_train, y_train, _, _) in splits.items():
+        data = hashlib.sha1(np.ascontiguousarray(X_train).tobytes())
+        data.update("\n".join(list(classes) + list(y_train)).encode("utf-8"))
+        group = _digest({"dataset": dataset, "data": data.hexdigest(),
+                         "training": asdict(settings)})
+        for config in grid:
+            units = config["number_of_hidden_units"]
+            # per epoch work grows with units^2 per stacked layer
+            cost = config["how_many_lstm_layers"] * units * (units + 2)
+            jobs.append(SweepJob(dataset, dict(config),
+                                 _digest({"group": group, "config": config}),
+                                 group, cost))
+    return jobs
+
+
+def median_stop(history: Sequence[float], peers: Sequence[Tuple[Sequence[float], bool]],
+                after: int, min_peers: int) -> bool:
+    """Median stopping rule: from epoch `after` on, a config is hopeless when
+    its best val_accuracy so far is below the median of the best the other
+    configs had reached after as many epochs. peers are (history, finished);
+    running peers that are not that far yet don't count."""
+    epoch = len(history)
+    if epoch < after:
+        return False
+    reached = [max(h[:epoch]) for h, finished in peers
+               if h and (len(h) >= epoch or finished)]
+    if len(reached) < min_peers:
+        return False
+    return max(history) < float(np.median(reached))
+
+
+def _peer_histories(job: SweepJob) -> List[Tuple[List[float], bool]]:
+    #every other config trained on the same data, running or finished
+    peers = []
+    for path in SWEEP_DIR.glob(f"{job.dataset}_*/progress.json"):
+        state = _read_json(path)
+        if not state or state.get("group") != job.group or state.get("key") == job.key:
+            continue
+        peers.append((state["history"], bool(state.get("status"))))
+    return peers
+
+
+# ---- worker side, tensorflow is only imported in the worker processes ----
+
+_worker: dict = {}
+
+
+def _init_worker(classes: List[str], splits: Dict[str, Tuple[np.ndarray, ...]],
+                 settings: TrainSettings, prune: PruneSettings, threads: int) -> None:
+    # the thread pools are sized when tensorflow is imported
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["TF_NUM_INTRAOP_THREADS"] = str(threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    _worker.update(classes=classes, splits=splits, settings=settings, prune=prune)
+
+
+def build_model(config: dict, num_classes: int, num_points: int = LSTM_POINTS):
+    """makeSimpleLstmModel from the notebook."""
+    from tensorflow.keras import layers, models
+
+    units   = config["number_of_hidden_units"]
+    dropout = config.get("dropout_fraction_between_layers", 0)
+    model = models.Sequential(name=f"Lstm_h{units}_L{config['how_many_lstm_layers']}")
+    model.add(layers.Input(shape=(num_points, 2)))
+    for _ in range(config["how_many_lstm_layers"] - 1):
+        model.add(layers.LSTM(units, return_sequences=True))
+        if dropout:
+            model.add(layers.Dropout(dropout))
+    model.add(layers.LSTM(units))
+    if dropout:
+        model.add(layers.Dropout(dropout))
+    model.add(layers.Dense(num_classes, activation="softmax"))
+    model.compile(optimizer="adam", loss="categorical_crossentropy",
+                  metrics=["accuracy"])
+    return model
+
+
+class _Progress:
+    """Per-epoch bookkeeping: checkpoint, best weights, early stopping and
+    pruning. The state lives in progress.json next to the checkpoint."""
+
+    def __init__(self, job: SweepJob, state: dict, settings: TrainSettings,
+                 prune: PruneSettings):
+        self.job, self.state = job, state
+        self.settings, self.prune = settings, prune
+
+    def epoch_end(self, model, logs: dict) -> bool:
+        state = self.state
+        val = float(logs.get("val_accuracy", 0.0))
+        state["history"].append(val)
+        epoch = len(state["history"]) - 1
+        if val > state["best"]:
+            state["best"], state["best_epoch"] = val, epoch
+            model.save_weights(self.job.dir / "best.weights.h5")
+        model.save(self.job.dir / "checkpoint.keras")
+
+        if epoch - state["best_epoch"] >= self.settings.patience:
+            state["status"] = STATUS_STOPPED
+        elif self.prune.enabled and median_stop(
+                state["history"], _peer_histories(self.job),
+                self.prune.after, self.prune.min_peers):
+            state["status"] = STATUS_PRUNED
+        _write_json(self.job.dir / "progress.json", state)
+        return bool(state.get("status"))
+
+
+def _train(job: SweepJob) -> SweepJob:
+    import tensorflow as tf
+
+    classes, settings = _worker["classes"], _worker["settings"]
+    X_train, y_train, X_test, y_test = _worker["splits"][job.dataset]
+    index = {name: i for i, name in enumerate(classes)}
+    onehot = tf.keras.utils.to_categorical([index[y] for y in y_train], len(classes))
+    job.dir.mkdir(parents=True, exist_ok=True)
+    checkpoint = job.dir / "checkpoint.keras"
+
+    state = _read_json(job.dir / "progress.json")
+    tf.keras.utils.set_random_seed(settings.seed)
+    if state and state["history"] and checkpoint.exists():
+        model = tf.keras.models.load_model(checkpoint)
+        if state.get("status") == STATUS_PRUNED and not _worker["prune"].enabled:
+            state["status"] = None
+    else:
+        model = build_model(job.config, len(classes), settings.num_points)
+        state = {"key": job.key, "group": job.group, "dataset": job.dataset,
+                 "config": job.config, "history": [], "best": -1.0,
+                 "best_epoch": -1, "status": None, "train_s": 0.0}
+        _write_json(job.dir / "progress.json", state)
+
+    progress = _Progress(job, state, settings, _worker["prune"])
+
+    class Hook(tf.keras.callbacks.Callback):
+        def on_epoch_end(self, epoch, logs=None):
+            if progress.epoch_end(self.model, logs or {}):
+                self.model.stop_training = True
+
+    t0 = time.perf_counter()
+    if not state.get("status") and len(state["history"]) < settings.epochs:
+        model.fit(X_train, onehot, epochs=settings.epochs,
+                  initial_epoch=len(state["history"]),
+                  batch_size=settings.batch_size,
+                  validation_split=settings.validation_split,
+                  verbose=0, callbacks=[Hook()])
+    state["train_s"] += time.perf_counter() - t0
+    if not state.get("status"):
+        state["status"] = STATUS_DONE
+    _write_json(job.dir / "progress.json", state)
+    # like EarlyStopping(restore_best_weights=True)
+    model.load_weights(job.dir / "best.weights.h5")
+
+    t0 = time.perf_counter()
+    proba = model.predict(X_test, verbose=0)
+    ms = (time.perf_counter() - t0) * 1000 / len(X_test)
+    acc = float(np.mean(np.array(classes)[proba.argmax(axis=1)] == y_test))
+
+    model.save(job.dir / "model.keras")
+    export_keras_model(model, job.dir / "model.npz", classes)
+    job.metrics = {
+        "model"   : job.name,
+        "evalset" : job.dataset,
+        "params"  : int(model.count_params()),
+        "acc"     : acc,
+        "ms"      : ms,
+        "val_acc" : state["best"],
+        "epochs"  : len(state["history"]),
+        "status"  : state["status"],
+        "train_s" : state["train_s"],
+        "config"  : job.config,
+        "key"     : job.key,
+    }
+    _write_json(job.dir / "metrics.json", job.metrics)
+    if state["status"] != STATUS_PRUNED:
+        # a pruned run keeps its checkpoint so --no-prune can continue it
+        checkpoint.unlink(missing_ok=True)
+        (job.dir / "best.weights.h5").unlink(missing_ok=True)
+    return job
+
+
+# ---- main process ----
+
+def _cached(job: SweepJob, prune: PruneSettings) -> bool:
+    metrics = _read_json(job.dir / "metrics.json")
+    if metrics is None:
+        return False
+    job.metrics = metrics
+    return prune.enabled or metrics["status"] != STATUS_PRUNED
+
+
+def run_sweep(datasets: Sequence[str] = tuple(DATASET_DIRS),
+              grid: Sequence[dict] = LSTM_SETTINGS_LIST,
+              workers: Optional[int] = None, threads: int = 2,
+              settings: TrainSettings = TrainSettings(),
+              prune: PruneSettings = PruneSettings()) -> List[dict]:
+    """Trains every (dataset, config) that isn't cached yet and returns the
+    metrics of all of them, in the notebook's results format plus epochs,
+    status and training time."""
+    classes, splits = load_splits(datasets, settings)
+    jobs = make_jobs(grid, classes, splits, settings)
+    # longest configs first, the small ones fill the gaps at the end
+    todo = sorted((j for j in jobs if not _cached(j, prune)),
+                  key=lambda j: j.cost, reverse=True)
+    print(f"{len(jobs) - len(todo)} of {len(jobs)} configs cached, {len(todo)} to train")
+
+    if todo:
+        if workers is None:
+            workers = max(1, (os.cpu_count() or 1) // threads)
+        workers = min(workers, len(todo))
+        SWEEP_DIR.mkdir(parents=True, exist_ok=True)
+        # spawn: tensorflow doesn't survive a fork
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker,
+                                 initargs=(classes, splits, settings, prune, threads)) as pool:
+            futures = {pool.submit(_train, job): job for job in todo}
+            try:
+                for future in as_completed(futures):
+                    job = futures[future]
+                    try:
+                        job.metrics = future.result().metrics
+                    except Exception as exc:  # noqa: BLE001 - keep the rest of the grid going
+                        print(f"{job.dataset:9} {job.name:16} failed: {exc!r}")
+                        continue
+                    m = job.metrics
+                    print(f"{job.dataset:9} {job.name:16} {m['status']:8} "
+                          f"epochs {m['epochs']:3} val {m['val_acc']:.3f} "
+                          f"test {m['acc']:.3f} ({m['train_s'] / 60:.1f} min)")
+            except KeyboardInterrupt:
+                for future in futures:
+                    future.cancel()
+                print("interrupted, run again to resume from the last epoch")
+                raise
+    return [j.metrics for j in jobs if j.metrics is not None]
+
+
+def load_models(dataset: str, grid: Sequence[dict] = LSTM_SETTINGS_LIST,
+                settings: TrainSettings = TrainSettings()) -> list:
+    """The trained Keras models of a sweep for one dataset, in grid order,
+    e.g. in the notebook instead of trainSeveralModelsOnOneDataset."""
+    import tensorflow as tf
+
+    classes, splits = load_splits([dataset], settings)
+    models = []
+    for job in make_jobs(grid, classes, splits, settings):
+        path = job.dir / "model.keras"
+        if not path.exists():
+            raise FileNotFoundError(f"{job.name} on {dataset} is not trained yet "
+                                    f"(python lstm_sweep.py --datasets {dataset})")
+        models.append(tf.keras.models.load_model(path))
+    return models
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Train the notebook's LSTM grid in parallel, cached and resumable.")
+    parser.add_argument("--datasets", nargs="+", default=list(DATASET_DIRS),
+                        choices=list(DATASET_DIRS))
+    parser.add_argument("--workers", type=int, default=None,
+                        help="training processes (default cores / threads)")
+    parser.add_argument("--threads", type=int, default=2,
+                        help="tensorflow threads per process")
+    parser.add_argument("--epochs", type=int, default=TrainSettings.epochs)
+    parser.add_argument("--no-prune", action="store_true",
+                        help="train every config to the end (resumes pruned ones)")
+    parser.add_argument("--prune-after", type=int, default=PruneSettings.after,
+                        help="epochs before a config can be pruned")
+    parser.add_argument("--out", type=Path, default=SWEEP_DIR / "results.json",
+                        help="metrics of the whole grid as JSON")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    results = run_sweep(args.datasets, LSTM_SETTINGS_LIST, args.workers, args.threads,
+                        TrainSettings(epochs=args.epochs),
+                        PruneSettings(enabled=not args.no_prune, after=args.prune_after))
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    print(f"\n{'evalset':9} {'model':16} {'params':>9} {'status':8} {'epochs':>6} "
+          f"{'val':>6} {'test':>6} {'ms':>7}")
+    for m in sorted(results, key=lambda m: (m["evalset"], -m["params"])):
+        print(f"{m['evalset']:9} {m['model']:16} {m['params']:9} {m['status']:8} "
+              f"{m['epochs']:6} {m['val_acc']:6.3f} {m['acc']:6.3f} {m['ms']:7.2f}")
+    print(f"{time.perf_counter() - t0:.0f} s, written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# hands fingertip positions from the HandMover thread to a window without going
+# through the OS cursor and the window system's event queue
+from __future__ import annotations
+
+from typing import List, Tuple
+
+# (perf_counter time, x, y) with x, y normalized to 0..1, y pointing down
+HandPoint = Tuple[float, float, float]
+
+
+class PointChannel:
+    """Ring buffer for exactly one producer and one consumer thread. Each
+    side only writes its own counter and a slot is filled before the write
+    counter moves past it, so no lock is needed. If the consumer falls more
+    than capacity points behind, the oldest points are dropped."""
+
+    def __init__(self, capacity: int = 1024):
+        self._buf: List[HandPoint] = [(0.0, 0.0, 0.0)] * capacity
+        self._capacity = capacity
+        self._written = 0
+        self._read = 0
+        self.dropped = 0
+
+    def push(self, t: float, x: float, y: float) -> None:
+        self._buf[self._written % self._capacity] = (t, x, y)
+        self._written += 1
+
+    def drain(self) -> List[HandPoint]:
+        written = self._written
+        start = max(self._read, written - self._capacity)
+        self.dropped += start - self._read
+        points = [self._buf[i % self._capacity] for i in range(start, written)]
+        self._read = written
+        return points
+
+    def __len__(self) -> int:
+        return self._written - self._read
@@ -1,19 +1,26 @@
 from __future__ import annotations
 
+import argparse
 import sys
 import threading
+import time
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import cv2
-import mediapipe as mp
-import pyglet
-from pyglet.window import key
-from pynput.mouse import Controller as MouseController, Button
+import numpy as np
 
-from gesture_save_window import GestureWindow
+from cursor_filters import (FILTERS, CursorFilter, ExponentialFilter, RecordingFilter,
+                            make_filter, path_metrics)
+from frame_sources import (CameraSource, Frame, FrameSource,
+                           LandmarkReplaySource, save_landmarks)
+from point_channel import PointChannel
 
 SMOOTHING         = 0.33
+INDEX_FINGER_TIP  = 8
+ROI_MARGIN        = 0.35   # crop around the last hand, relative to its size
+ROI_MIN_HALF      = 0.1
+ROI_MIN_PX        = 192
 PREVIEW_TITLE     = "Camera Feed"
 INSTRUCTION_TEXT  = "Q quit  | SPACE draw (WINDOW MUST HAVE FOCUS!) | S save"
 
@@ -28,84 +35,342 @@ def get_screen_size() -> Tuple[int, int]:
 class HandState:
     tip: Optional[Tuple[float, float]] = None
 
+
+class LatestFrameBuffer:
+    """Hands items from one pipeline stage to the next. Holds at most one
+    item: put() never blocks and replaces an item that wasn't taken yet, so
+    a slow consumer always gets the newest frame instead of a backlog."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item: Any = None
+        self._has_item = False
+        self.dropped = 0
+
+    def put(self, item: Any, wait: bool = False) -> None:
+        #wait=True blocks until the last item was taken instead of dropping it
+        with self._cond:
+            if wait:
+                self._cond.wait_for(lambda: not self._has_item)
+            if self._has_item:
+                self.dropped += 1
+            self._item, self._has_item = item, True
+            self._cond.notify_all()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._has_item, timeout):
+                return None
+            item, self._item, self._has_item = self._item, None, False
+            self._cond.notify_all()
+            return item
+
+
+@dataclass
+class StageTimer:
+    count  : int   = 0
+    total_s: float = 0.0
+    max_s  : float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count   += 1
+        self.total_s += seconds
+        self.max_s    = max(self.max_s, seconds)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_s * 1000 / self.count if self.count else 0.0
+
 class HandMover(threading.Thread):
     def __init__(self, state: HandState,
-                 cam_width: int = 1280, cam_height: int = 960):
+                 cam_width: int = 1280, cam_height: int = 960,
+                 source: Optional[FrameSource] = None,
+                 preview: bool = True,
+                 move_cursor: bool = True,
+                 screen_size: Optional[Tuple[int, int]] = None,
+                 record_path: Optional[str] = None,
+                 inference_scale: float = 1.0,
+                 roi_tracking: bool = False,
+                 cursor_filter: Optional[CursorFilter] = None,
+                 channel: Optional[PointChannel] = None):
         super().__init__(daemon=True)
         self.state = state
         self.running = True
 
-        self._mp_hands = mp.solutions.hands
-        self._hands = self._mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=1,
-            model_complexity=0,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5,
-        )
-
-        self._cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-        if not self._cap.isOpened():
-            raise RuntimeError("No webcam found")
-
-        self._cap.set(cv2.CAP_PROP_FRAME_WIDTH,  cam_width)
-        self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, cam_height)
+        self._source = source or CameraSource(0, cam_width, cam_height)
         self._cam_width, self._cam_height = cam_width, cam_height
+        self._preview = preview
+        # created on the first camera image, replayed landmarks don't need it.
+        # static_image_mode False (video, tracks between frames) for full
+        # frames, True for ROI crops: each crop has another size and offset,
+        # so tracking state from the previous crop doesn't fit the next one
+        self._hands: Dict[bool, object] = {}
+        self._inference_scale = inference_scale
+        self._roi_tracking = roi_tracking
+        self._roi: Optional[Tuple[float, float, float, float]] = None
 
-        self._scr_w, self._scr_h = get_screen_size()
-        self._mouse = MouseController()
+        self._scr_w, self._scr_h = screen_size or get_screen_size()
+        self._mouse = None
+        if move_cursor:
+            from pynput.mouse import Controller as MouseController
+            self._mouse = MouseController()
         self._cx, self._cy = self._scr_w / 2, self._scr_h / 2
+        self._filter = cursor_filter or ExponentialFilter(SMOOTHING)
+        self.channel = channel
 
-    def run(self):
-        try:
-            while self.running:
-                ok, frame = self._cap.read()
-                if not ok:
-                    continue
-                frame = cv2.flip(frame, 1)
-                rgb   = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                res   = self._hands.process(rgb)
-
-                if res.multi_hand_landmarks:
-                    lms = res.multi_hand_landmarks[0].landmark
-                    idx = lms[self._mp_hands.HandLandmark.INDEX_FINGER_TIP]
-
-                    tx, ty = idx.x * self._scr_w, idx.y * self._scr_h
-                    self._cx += (tx - self._cx) * SMOOTHING
-                    self._cy += (ty - self._cy) * SMOOTHING
+        self._record_path = record_path
+        self._recorded: List[Tuple[float, Optional[np.ndarray]]] = []
+
+        self._captured = LatestFrameBuffer()
+        self._inferred = LatestFrameBuffer()
+        self._capture_done = threading.Event()
+        self.timers: Dict[str, StageTimer] = {
+            name: StageTimer()
+            for name in ("capture", "inference", "preview", "latency")
+        }
+        self._started_at = 0.0
+        self._stopped_at = 0.0
+
+    def _process(self, image: np.ndarray,
+                 static: bool = False) -> Optional[np.ndarray]:
+        if static not in self._hands:
+            import mediapipe as mp
+            self._hands[static] = mp.solutions.hands.Hands(
+                static_image_mode=static,
+                max_num_hands=1,
+                model_complexity=0,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5,
+            )
+        res = self._hands[static].process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        if not res.multi_hand_landmarks:
+            return None
+        return np.array([(p.x, p.y, p.z)
+                         for p in res.multi_hand_landmarks[0].landmark])
+
+    def _detect(self, image: np.ndarray) -> Optional[np.ndarray]:
+        """Landmarks normalized to the full image. With roi_tracking only a
+        crop around the last hand is searched, the full (downscaled) frame
+        is the fallback when the hand is lost."""
+        h, w = image.shape[:2]
+        if self._roi is not None:
+            x0, y0, x1, y1 = self._roi
+            crop = image[int(y0 * h):int(y1 * h), int(x0 * w):int(x1 * w)]
+            if crop.size:
+                lms = self._process(self._downscale(crop), static=True)
+                if lms is not None:
+                    lms[:, 0] = x0 + lms[:, 0] * (x1 - x0)
+                    lms[:, 1] = y0 + lms[:, 1] * (y1 - y0)
+                    self._update_roi(lms)
+                    return lms
+            self._roi = None
+
+        lms = self._process(self._downscale(image))
+        if lms is not None and self._roi_tracking:
+            self._update_roi(lms)
+        return lms
+
+    def _downscale(self, image: np.ndarray) -> np.ndarray:
+        #never below ROI_MIN_PX on the short side, MediaPipe gets unreliable
+        h, w = image.shape[:2]
+        scale = max(self._inference_scale, ROI_MIN_PX / min(h, w))
+        if scale >= 1.0:
+            return image
+        return cv2.resize(image, (int(w * scale), int(h * scale)),
+                          interpolation=cv2.INTER_AREA)
+
+    def _update_roi(self, lms: np.ndarray) -> None:
+        (x0, y0), (x1, y1) = lms[:, :2].min(axis=0), lms[:, :2].max(axis=0)
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        half = max(max(x1 - x0, y1 - y0) * (0.5 + ROI_MARGIN), ROI_MIN_HALF)
+        self._roi = (max(cx - half, 0.0), max(cy - half, 0.0),
+                     min(cx + half, 1.0), min(cy + half, 1.0))
+
+    # capture -> inference -> preview, each stage in its own thread and
+    # connected by LatestFrameBuffers, so a slow stage drops frames instead
+    # of delaying the cursor. run() itself is the preview stage, cv2 windows
+    # have to stay on one thread.
+    def _capture_loop(self):
+        while self.running:
+            t0 = time.perf_counter()
+            frame = self._source.read()
+            if frame is None:
+                if self._source.exhausted:
+                    break
+                continue
+            self.timers["capture"].add(time.perf_counter() - t0)
+            self._captured.put(frame, wait=not self._source.drop_frames)
+        self._capture_done.set()
+
+    def _inference_loop(self):
+        while self.running:
+            frame: Frame = self._captured.get(timeout=0.1)
+            if frame is None:
+                if self._capture_done.is_set():
+                    self.running = False
+                continue
+            t0 = time.perf_counter()
+            lms = frame.landmarks
+            if frame.image is not None:
+                if self._source.mirror:
+                    frame.image = cv2.flip(frame.image, 1)
+                lms = self._detect(frame.image)
+
+            if lms is not None:
+                tx, ty = lms[INDEX_FINGER_TIP, 0] * self._scr_w, lms[INDEX_FINGER_TIP, 1] * self._scr_h
+                t = frame.stamp if frame.captured is None else frame.captured
+                self._cx, self._cy = self._filter(tx, ty, t)
+                self.state.tip = (self._cx, self._cy)
+                if self.channel is not None:
+                    self.channel.push(frame.stamp, self._cx / self._scr_w,
+                                      self._cy / self._scr_h)
+                if self._mouse is not None:
                     try:
                         self._mouse.position = (int(self._cx), int(self._cy))
                     except Exception:
                         pass
+                self.timers["latency"].add(time.perf_counter() - frame.stamp)
+            if self._record_path:
+                self._recorded.append((frame.stamp, lms))
 
-                    mp.solutions.drawing_utils.draw_landmarks(
-                        frame, res.multi_hand_landmarks[0],
-                        self._mp_hands.HAND_CONNECTIONS,
-                    )
+            self.timers["inference"].add(time.perf_counter() - t0)
+            if self._preview and frame.image is not None:
+                self._inferred.put((frame.image, lms, self._roi))
 
-                cv2.imshow(PREVIEW_TITLE,
-                           cv2.resize(frame, (self._cam_width, self._cam_height)))
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    self.running = False
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        out = {name: {"count": t.count, "mean_ms": t.mean_ms,
+                      "max_ms": t.max_s * 1000}
+               for name, t in self.timers.items()}
+        out["capture"]["dropped"]   = self._captured.dropped
+        out["inference"]["dropped"] = self._inferred.dropped
+        elapsed = (self._stopped_at or time.perf_counter()) - self._started_at
+        if self._started_at and elapsed > 0:
+            out["throughput"] = {
+                "frames_per_s" : self.timers["inference"].count / elapsed,
+                "cursor_per_s" : self.timers["latency"].count / elapsed,
+                "seconds"      : elapsed,
+            }
+        return out
+
+    def _show_preview(self):
+        item = self._inferred.get(timeout=0.1)
+        if item is None:
+            return
+        t0 = time.perf_counter()
+        image, lms, roi = item
+        h, w = image.shape[:2]
+        if lms is not None:
+            import mediapipe as mp
+            px = (lms[:, :2] * (w, h)).astype(int)
+            for a, b in mp.solutions.hands.HAND_CONNECTIONS:
+                cv2.line(image, tuple(px[a]), tuple(px[b]), (255, 255, 255), 2)
+            for p in px:
+                cv2.circle(image, tuple(p), 4, (0, 0, 255), -1)
+        if roi is not None:
+            cv2.rectangle(image, (int(roi[0] * w), int(roi[1] * h)),
+                          (int(roi[2] * w), int(roi[3] * h)), (0, 255, 0), 1)
+
+        cv2.imshow(PREVIEW_TITLE,
+                   cv2.resize(image, (self._cam_width, self._cam_height)))
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            self.running = False
+        self.timers["preview"].add(time.perf_counter() - t0)
+
+    def run(self):
+        self._started_at = time.perf_counter()
+        workers = [threading.Thread(target=self._capture_loop, daemon=True),
+                   threading.Thread(target=self._inference_loop, daemon=True)]
+        for w in workers:
+            w.start()
+        try:
+            while self.running:
+                if self._preview:
+                    self._show_preview()
+                else:
+                    time.sleep(0.05)
         finally:
-            self._cap.release()
-            cv2.destroyAllWindows()
+            self.running = False
+            for w in workers:
+                w.join(timeout=1.0)
+            self._stopped_at = time.perf_counter()
+            self._source.release()
+            if self._preview:
+                cv2.destroyAllWindows()
+            if self._record_path:
+                stamps, lms = zip(*self._recorded) if self._recorded else ((), ())
+                save_landmarks(self._record_path, list(stamps), list(lms))
+
+
+def replay_benchmark(path: str, realtime: bool = False,
+                     screen_size: Tuple[int, int] = (1920, 1080),
+                     cursor_filter: Optional[CursorFilter] = None
+                     ) -> Dict[str, Dict[str, float]]:
+    """Runs HandMover headless on a recorded landmark file (see record_path)
+    and returns its stage timings and cursor update rate, plus the lag and
+    jitter the cursor filter leaves on the recorded fingertip path."""
+    recording = RecordingFilter(cursor_filter or ExponentialFilter(SMOOTHING))
+    mover = HandMover(HandState(), source=LandmarkReplaySource(path, realtime),
+                      preview=False, move_cursor=False, screen_size=screen_size,
+                      cursor_filter=recording)
+    mover.start()
+    mover.join()
+    stats = mover.stats()
+    stats["filter"] = path_metrics(recording.samples)
+    return stats
+
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--record", help="save the tracked landmarks to this .npz")
+    parser.add_argument("--replay", help="benchmark HandMover on a recorded .npz")
+    parser.add_argument("--realtime", action="store_true",
+                        help="replay at recorded speed instead of as fast as possible")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="downscale camera frames before hand detection, e.g. 0.5")
+    parser.add_argument("--roi", action="store_true",
+                        help="only search around the last hand position")
+    parser.add_argument("--filter", choices=sorted(FILTERS), default="ema",
+                        help="cursor smoothing, see cursor_filters.py")
+    parser.add_argument("--os-cursor", action="store_true",
+                        help="move the system mouse instead of feeding the window directly")
+    args = parser.parse_args()
+
+    if args.replay:
+        for name, st in replay_benchmark(args.replay, args.realtime,
+                                         cursor_filter=make_filter(args.filter)).items():
+            print(f"{name:<10} {st}")
+        return
+
+    # only now: --replay has to work without a display (e.g. in CI)
+    import pyglet
+    from pyglet.window import key
+    from pynput.mouse import Button
+
+    from gesture_save_window import GestureWindow
+
     state = HandState()
+    channel = None if args.os_cursor else PointChannel()
     try:
-        mover = HandMover(state)
+        mover = HandMover(state, record_path=args.record,
+                          inference_scale=args.scale, roi_tracking=args.roi,
+                          cursor_filter=make_filter(args.filter),
+                          channel=channel, move_cursor=args.os_cursor)
     except RuntimeError as exc:
         print(exc, file=sys.stderr)
         sys.exit(1)
     mover.start()
 
     window = GestureWindow()
+    if channel is not None:
+        window.attach_hand(channel, window.batch)
 
     @window.event
     def on_key_press(symbol, modifiers):
         if symbol == key.SPACE:
-            mover._mouse.press(Button.left)
+            if channel is not None:
+                window.pen_down()
+            else:
+                mover._mouse.press(Button.left)
         elif symbol == key.S:
             window.save_last_shape()
         elif symbol == key.Q:
@@ -114,13 +379,18 @@ def main():
     @window.event
     def on_key_release(symbol, modifiers):
         if symbol == key.SPACE:
-            mover._mouse.release(Button.left)
+            if channel is not None:
+                window.pen_up()
+            else:
+                mover._mouse.release(Button.left)
 
     try:
         pyglet.app.run()
     finally:
         mover.running = False
         mover.join(timeout=2.0)
+        for name, st in mover.stats().items():
+            print(f"{name:<10} {st}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,111 @@
+# runs recognition off the pyglet event thread, results come back on the clock
+from __future__ import annotations
+
+import logging
+import queue
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import pyglet
+
+DELIVER_RATE = 1 / 120
+
+log = logging.getLogger(__name__)
+
+_worker_recognizer = None
+
+
+def _init_worker(recognizer) -> None:
+    global _worker_recognizer
+    _worker_recognizer = recognizer
+
+
+def _recognize_in_worker(points):
+    return _worker_recognizer.recognize(points)
+
+
+def _recognize_normalized_in_worker(pts):
+    return _worker_recognizer.recognize_normalized(pts)
+
+
+def _nbest_normalized_in_worker(args):
+    return _worker_recognizer.nbest_normalized(*args)
+
+
+class RecognitionService:
+    """Runs DollarRecognizer calls in a worker thread (or processes) and
+    returns futures. Callbacks are queued and called from the pyglet clock,
+    so they run on the main thread and can touch sprites and labels. If the
+    call raised, the exception is logged and on_error gets it instead, so a
+    caller that shows "Recognizing..." can reset its state.
+
+    With use_processes each worker gets a copy of the recognizer when the
+    service is created, templates added later are not seen by them."""
+
+    def __init__(self, recognizer, workers: int = 1,
+                 use_processes: bool = False):
+        self.recognizer = recognizer
+        self._use_processes = use_processes
+        if use_processes:
+            self._pool: Executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker,
+                initargs=(recognizer,))
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix="recognizer")
+        self._done: "queue.SimpleQueue[Tuple[Callable, Optional[Callable], Future]]" = queue.SimpleQueue()
+        pyglet.clock.schedule_interval(self._deliver, DELIVER_RATE)
+
+    def _submit(self, fn, arg, callback: Optional[Callable],
+                on_error: Optional[Callable[[BaseException], None]]) -> Future:
+        future = self._pool.submit(fn, arg)
+        #always queued, so failures get logged even without callbacks
+        future.add_done_callback(lambda f: self._done.put((callback, on_error, f)))
+        return future
+
+    def submit(self, points: List[Tuple[float, float]],
+               callback: Optional[Callable] = None,
+               on_error: Optional[Callable[[BaseException], None]] = None) -> Future:
+        """recognize(points) in the background, points are copied first."""
+        fn = _recognize_in_worker if self._use_processes else self.recognizer.recognize
+        return self._submit(fn, list(points), callback, on_error)
+
+    def submit_normalized(self, pts: np.ndarray,
+                          callback: Optional[Callable] = None,
+                          on_error: Optional[Callable[[BaseException], None]] = None
+                          ) -> Future:
+        fn = (_recognize_normalized_in_worker if self._use_processes
+              else self.recognizer.recognize_normalized)
+        return self._submit(fn, pts, callback, on_error)
+
+    def submit_nbest(self, pts: np.ndarray, k: int = 3,
+                     callback: Optional[Callable] = None,
+                     on_error: Optional[Callable[[BaseException], None]] = None
+                     ) -> Future:
+        """nbest_normalized(pts, k), the callback gets the list of Results."""
+        if self._use_processes:
+            return self._submit(_nbest_normalized_in_worker, (pts, k),
+                                callback, on_error)
+        return self._submit(lambda args: self.recognizer.nbest_normalized(*args),
+                            (pts, k), callback, on_error)
+
+    def _deliver(self, _dt: float) -> None:
+        while True:
+            try:
+                callback, on_error, future = self._done.get_nowait()
+            except queue.Empty:
+                return
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if error is not None:
+                log.error("recognition failed", exc_info=error)
+                if on_error is not None:
+                    on_error(error)
+            elif callback is not None:
+                callback(future.result())
+
+    def shutdown(self) -> None:
+        pyglet.clock.unschedule(self._deliver)
+        self._pool.shutdown(wait=False, cancel_futures=True)
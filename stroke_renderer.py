@@ -0,0 +1,100 @@
+# in-progress stroke as one vertex list that grows with the stroke, instead of
+# one shapes.Line per segment
+from __future__ import annotations
+
+from typing import Iterable, Optional, Tuple
+
+import pyglet
+from pyglet import shapes
+from pyglet.gl import GL_TRIANGLES
+
+VERTS_PER_SEGMENT = 6   # two triangles, like shapes.Line
+
+
+class StrokeRenderer:
+    """Draws a polyline with the given thickness. Segments are written into
+    a preallocated vertex list that doubles when full, unused segments stay
+    collapsed to a point and draw nothing. reset() only zeroes the used part.
+    Without a batch the renderer has its own one, draw it with draw()."""
+
+    def __init__(self, batch: Optional[pyglet.graphics.Batch] = None,
+                 thickness: float = 3.0,
+                 color: Tuple[int, int, int] = (255, 255, 255),
+                 capacity: int = 256):
+        self._own_batch = batch is None
+        self._batch = batch or pyglet.graphics.Batch()
+        self._program = shapes.get_default_shader()
+        self._group = pyglet.graphics.ShaderGroup(self._program)
+        self.thickness = thickness
+        self._rgba = (*color[:3], 255)
+        self._capacity = capacity
+        self._segments = 0
+        self._last: Optional[Tuple[float, float]] = None
+
+        count = capacity * VERTS_PER_SEGMENT
+        self._vertex_list = self._program.vertex_list(
+            count, GL_TRIANGLES, self._batch, self._group,
+            position=('f', (0.0, 0.0) * count),
+            colors=('Bn', self._rgba * count),
+            **self._constant_attributes(count))
+
+    def _constant_attributes(self, count: int) -> dict:
+        #the shape shader also wants translation/rotation(/zposition), all 0 here
+        attrs = {}
+        for name, meta in self._program.attributes.items():
+            if name not in ("position", "colors"):
+                attrs[name] = (meta["format"], (0,) * meta["count"] * count)
+        return attrs
+
+    def __len__(self) -> int:
+        return self._segments
+
+    def _grow(self) -> None:
+        old = self._capacity * VERTS_PER_SEGMENT
+        self._capacity *= 2
+        new = self._capacity * VERTS_PER_SEGMENT
+        self._vertex_list.resize(new)
+        vl = self._vertex_list
+        vl.position[old * 2:] = (0.0, 0.0) * (new - old)
+        vl.colors[:] = self._rgba * new
+        for name, (_, data) in self._constant_attributes(new).items():
+            getattr(vl, name)[:] = data
+
+    def add_point(self, x: float, y: float) -> None:
+        if self._last is None:
+            self._last = (x, y)
+            return
+        x1, y1 = self._last
+        dx, dy = x - x1, y - y1
+        length = (dx * dx + dy * dy) ** 0.5
+        if length == 0:
+            return
+        self._last = (x, y)
+        if self._segments == self._capacity:
+            self._grow()
+
+        nx, ny = -dy / length * self.thickness / 2, dx / length * self.thickness / 2
+        i = self._segments * VERTS_PER_SEGMENT * 2
+        self._vertex_list.position[i:i + VERTS_PER_SEGMENT * 2] = (
+            x1 + nx, y1 + ny, x1 - nx, y1 - ny, x - nx, y - ny,
+            x1 + nx, y1 + ny, x - nx, y - ny, x + nx, y + ny,
+        )
+        self._segments += 1
+
+    def extend(self, points: Iterable[Tuple[float, float]]) -> None:
+        for x, y in points:
+            self.add_point(x, y)
+
+    def reset(self) -> None:
+        if self._segments:
+            n = self._segments * VERTS_PER_SEGMENT
+            self._vertex_list.position[:n * 2] = (0.0, 0.0) * n
+        self._segments = 0
+        self._last = None
+
+    def draw(self) -> None:
+        if self._own_batch:
+            self._batch.draw()
+
+    def delete(self) -> None:
+        self._vertex_list.delete()
@@ -0,0 +1,5 @@
+# the tests import the flat modules and the dollar package from the repo root
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
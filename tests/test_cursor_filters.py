@@ -0,0 +1,32 @@
+# the filter benchmark on the recorded gestures: jitter is the tracking
+# noise a filter lets through, raw lets all of it through
+import math
+from pathlib import Path
+
+import pytest
+
+from cursor_filters import ExponentialFilter, KalmanFilter, OneEuroFilter, benchmark
+
+DATASET = Path(__file__).parent.parent / "datasets" / "own_recorded_gestures"
+
+
+@pytest.fixture(scope="module")
+def results():
+    return benchmark({"raw"     : ExponentialFilter(1.0),
+                      "ema"     : ExponentialFilter(),
+                      "one_euro": OneEuroFilter(),
+                      "kalman"  : KalmanFilter()}, DATASET, noise_px=4.0)
+
+
+def test_raw_jitter_is_the_tracking_noise(results):
+    assert results["raw"]["jitter_px"] == pytest.approx(4.0 * math.sqrt(2), rel=0.05)
+
+
+@pytest.mark.parametrize("name", ["ema", "one_euro", "kalman"])
+def test_filters_remove_jitter(results, name):
+    assert results[name]["jitter_px"] < results["raw"]["jitter_px"]
+
+
+def test_smoothing_trades_jitter_for_lag(results):
+    assert results["ema"]["jitter_px"] < results["one_euro"]["jitter_px"]
+    assert results["ema"]["lag_ms"] > results["one_euro"]["lag_ms"]
@@ -0,0 +1,81 @@
+# the lower bound pruning and MATCH_COARSE have to find the same best
+# template as the full search, they only change the order templates are
+# checked in
+import numpy as np
+import pytest
+
+from dollar import (MATCH_COARSE, MATCH_GOLDEN, MATCH_PROTRACTOR,
+                    DollarRecognizer, Template)
+from dollar.datasets import DATASET_DIRS, load_dataset
+
+SAMPLES = [s for key in DATASET_DIRS for s in load_dataset(key)]
+
+
+def _recognizers(templates):
+    out = []
+    for method in (MATCH_GOLDEN, MATCH_COARSE):
+        recognizer = DollarRecognizer(window_h=0, method=method)
+        recognizer.add_templates(templates)
+        out.append(recognizer)
+    return out
+
+
+def _candidates(seed=0):
+    rng = np.random.default_rng(seed)
+    return [s.points + rng.normal(0.0, 4.0, s.points.shape) for s in SAMPLES]
+
+
+def _normalized(pts):
+    return np.asarray(Template("", pts).points, dtype=float)
+
+
+@pytest.mark.parametrize("copies", [1, 10])
+def test_coarse_matches_full_search(copies):
+    #templates from every other sample, candidates are the other ones plus
+    #noise, so none of them is a template. copies > 1 adds jittered
+    #templates, then the shortlist is a small part of the library
+    rng = np.random.default_rng(1)
+    templates = [Template(s.name, s.points + (rng.normal(0.0, 3.0, s.points.shape) if c else 0))
+                 for c in range(copies) for s in SAMPLES[::2]]
+    golden, coarse = _recognizers(templates)
+    names = [t.name for t in templates]
+    for pts in _candidates()[1::2]:
+        pts = _normalized(pts)
+        full = golden.template_distances(pts)
+        truth = int(np.argmin(full))
+        for recognizer in (golden, coarse):
+            result = recognizer.recognize_normalized(pts)
+            assert result.name == names[truth]
+            assert result.distance == pytest.approx(full[truth], abs=1e-9)
+
+
+def test_coarse_matches_full_search_batch():
+    golden, coarse = _recognizers([Template(s.name, s.points) for s in SAMPLES[::2]])
+    strokes = _candidates(seed=2)[1::2]
+    truth = np.argmin(golden.distance_matrix(strokes, workers=1), axis=1)
+    assert ([r.name for r in coarse.recognize_many(strokes, workers=1)]
+            == [golden.templates[i].name for i in truth])
+
+
+@pytest.mark.parametrize("method", [MATCH_GOLDEN, MATCH_PROTRACTOR])
+def test_pruned_match_equals_full_search(method):
+    recognizer = DollarRecognizer(window_h=0, method=method)
+    recognizer.add_templates([Template(s.name, s.points) for s in SAMPLES])
+    names = np.array([t.name for t in recognizer.templates])
+    for pts in _candidates(seed=3)[::7]:
+        pts = _normalized(pts)
+        full = recognizer.template_distances(pts)
+        result = recognizer.recognize_normalized(pts)
+        assert result.distance == pytest.approx(full.min(), abs=1e-9)
+        assert result.name == names[np.argmin(full)]
+        best = {n: full[names == n].min() for n in set(names)}
+        top = sorted(best, key=best.get)[:3]
+        assert [r.name for r in recognizer.nbest_normalized(pts, 3)] == top
+
+
+def test_distance_matrix_without_templates():
+    recognizer = DollarRecognizer(window_h=0)
+    strokes = _candidates()[:3]
+    assert recognizer.distance_matrix(strokes, workers=1).shape == (3, 0)
+    assert recognizer.distance_matrix([], workers=1).shape == (0, 0)
+    assert recognizer.template_distances(_normalized(strokes[0])).shape == (0,)
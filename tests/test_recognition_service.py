@@ -0,0 +1,45 @@
+# failures in the worker must reach the caller instead of being dropped
+import logging
+import time
+
+import numpy as np
+import pytest
+
+from dollar import DollarRecognizer
+from dollar.store import load_builtin_templates
+from recognition_service import RecognitionService
+
+BAD_SHAPE = np.zeros((10, 2))  #not resampled, recognize_normalized raises
+
+
+@pytest.fixture
+def service():
+    recognizer = DollarRecognizer(window_h=720)
+    recognizer.add_templates(load_builtin_templates())
+    svc = RecognitionService(recognizer)
+    yield svc
+    svc.shutdown()
+
+
+def _drain(svc, future):
+    future.exception(timeout=5)
+    time.sleep(0.01)  #done callbacks run right after the future resolves
+    svc._deliver(0.0)
+
+
+def test_error_goes_to_on_error_and_log(service, caplog):
+    results, errors = [], []
+    future = service.submit_normalized(BAD_SHAPE, results.append, errors.append)
+    with caplog.at_level(logging.ERROR, logger="recognition_service"):
+        _drain(service, future)
+    assert results == []
+    assert len(errors) == 1 and errors[0] is future.exception()
+    assert "recognition failed" in caplog.text
+
+
+def test_error_without_on_error_is_logged(service, caplog):
+    results = []
+    future = service.submit_normalized(BAD_SHAPE, results.append)
+    with caplog.at_level(logging.ERROR, logger="recognition_service"):
+        _drain(service, future)
+    assert results == [] and "recognition failed" in caplog.text
@@ -0,0 +1,54 @@
+# pointing_input --replay has to run headless, without a display or camera
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from frame_sources import NUM_LANDMARKS, save_landmarks
+
+ROOT = Path(__file__).parent.parent
+
+
+@pytest.fixture
+def recording(tmp_path):
+    rng = np.random.default_rng(0)
+    stamps, landmarks = [], []
+    for i, t in enumerate(np.arange(0.0, 2.0, 1 / 30)):
+        lms = np.full((NUM_LANDMARKS, 3), 0.5)
+        lms[8, :2] = 0.5 + 0.2 * np.array([np.sin(2 * t), np.cos(2 * t)])
+        lms[8, :2] += rng.normal(0.0, 0.003, 2)
+        stamps.append(float(t))
+        landmarks.append(None if i % 20 == 5 else lms)
+    path = tmp_path / "hand.npz"
+    save_landmarks(path, stamps, landmarks)
+    return path
+
+
+def _headless_env():
+    env = {k: v for k, v in os.environ.items()
+           if k not in ("DISPLAY", "WAYLAND_DISPLAY")}
+    env["PYTHONPATH"] = str(ROOT)
+    return env
+
+
+def test_replay_benchmark_without_gui_imports(recording):
+    code = ("import sys, pointing_input as pi\n"
+            f"stats = pi.replay_benchmark({str(recording)!r})\n"
+            "assert stats['inference']['count'] > 0, stats\n"
+            "assert stats['filter']['jitter_px'] >= 0, stats\n"
+            "assert 'pyglet' not in sys.modules\n")
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=_headless_env(),
+                   check=True, timeout=60)
+
+
+@pytest.mark.parametrize("cursor_filter", ["ema", "one_euro", "kalman"])
+def test_replay_cli_without_display(recording, cursor_filter):
+    out = subprocess.run([sys.executable, "pointing_input.py", "--replay",
+                          str(recording), "--filter", cursor_filter],
+                         cwd=ROOT, env=_headless_env(), capture_output=True,
+                         text=True, timeout=60)
+    assert out.returncode == 0, out.stderr
+    assert "inference" in out.stdout and "filter" in out.stdout
@@ -0,0 +1,88 @@
+# the one-pass resample against the loop from dollar.js it replaced
+import math
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from dollar import NUM_POINTS, resample, resample_many
+from dollar.datasets import BASE_DIR, parse_gesture_file
+
+DATASET_FILES = sorted(BASE_DIR.glob("**/*.xml"))
+
+
+def _dist(a, b):
+    return math.hypot(b[0] - a[0], b[1] - a[1])
+
+
+def reference_resample(points, n=NUM_POINTS):
+    #the previous implementation, converted from dollar.js
+    if not points:
+        return []
+    total_length = sum(_dist(points[i - 1], points[i]) for i in range(1, len(points)))
+
+    if total_length == 0:
+        return [points[0] for _ in range(n)]
+    I = total_length / (n - 1)
+    D = 0.0
+    new_pts = [points[0]]
+    pts = list(points)
+    i = 1
+    while i < len(pts) and len(new_pts) < n:
+        d = _dist(pts[i - 1], pts[i])
+        if (D + d) >= I:
+            t  = (I - D) / d
+            qx = pts[i - 1][0] + t * (pts[i][0] - pts[i - 1][0])
+            qy = pts[i - 1][1] + t * (pts[i][1] - pts[i - 1][1])
+            q  = (qx, qy)
+            new_pts.append(q)
+            pts.insert(i, q)
+            D = 0.0
+            i += 1
+        else:
+            D += d
+            i += 1
+
+    while len(new_pts) < n:
+        new_pts.append(pts[-1])
+    return new_pts
+
+
+def _check(points, n=NUM_POINTS):
+    expected = np.array(reference_resample(points, n), dtype=float)
+    got = resample(points, n)
+    assert got.shape == (n, 2)
+    assert np.allclose(got, expected, atol=1e-6)
+    assert np.allclose(resample_many([points], n)[0], expected, atol=1e-6)
+
+
+def test_dataset_files_exist():
+    assert DATASET_FILES, f"no xml gestures under {BASE_DIR}"
+
+
+@pytest.mark.parametrize("path", DATASET_FILES, ids=lambda p: f"{p.parent.name}/{p.name}")
+@pytest.mark.parametrize("n", [NUM_POINTS, 128])
+def test_dataset_stroke(path: Path, n: int):
+    _check([tuple(p) for p in parse_gesture_file(path)], n)
+
+
+@pytest.mark.parametrize("path", DATASET_FILES[::10], ids=lambda p: f"{p.parent.name}/{p.name}")
+def test_dataset_stroke_with_repeated_points(path: Path):
+    #hand tracking often reports the same position for several frames
+    points = [tuple(p) for p in parse_gesture_file(path)]
+    doubled = [p for i, p in enumerate(points) for _ in range(2 if i % 3 == 0 else 1)]
+    _check(doubled)
+
+
+@pytest.mark.parametrize("points", [
+    [(0.0, 0.0), (0.0, 0.0), (10.0, 0.0), (10.0, 0.0), (10.0, 10.0)],
+    [(5.0, 5.0), (5.0, 5.0), (5.0, 5.0), (6.0, 5.0)],
+    [(1.0, 2.0), (3.0, 4.0), (3.0, 4.0), (3.0, 4.0)],
+], ids=["inner", "leading", "trailing"])
+def test_zero_length_segments(points):
+    _check(points)
+
+
+@pytest.mark.parametrize("points", [[(3.0, 4.0)], [(3.0, 4.0)] * 5])
+def test_zero_length_stroke(points):
+    _check(points)
@@ -0,0 +1,53 @@
+# template stores as written by dollar.condense --out and read by --templates
+import numpy as np
+import pytest
+
+from dollar import DollarRecognizer, Template
+from dollar.datasets import DATASET_DIRS, load_dataset
+from dollar.store import load_template_store, save_templates
+
+SAMPLES = load_dataset(DATASET_DIRS["mid_air"])
+
+
+def test_store_round_trip(tmp_path):
+    templates = [Template(s.name, s.points, source=s.file) for s in SAMPLES[::3]]
+    save_templates(tmp_path / "lib.npz", templates)
+    loaded = load_template_store(tmp_path / "lib.npz")
+    assert [(t.name, t.source) for t in loaded] == [(t.name, t.source) for t in templates]
+    np.testing.assert_allclose([t.points for t in loaded], [t.points for t in templates])
+
+    recognizer = DollarRecognizer(window_h=0)
+    recognizer.add_templates(loaded)
+    pts = np.asarray(templates[0].points, dtype=float)
+    assert recognizer.recognize_normalized(pts).name == templates[0].name
+
+
+def test_store_with_other_settings_is_an_error(tmp_path):
+    save_templates(tmp_path / "lib.npz", [Template(SAMPLES[0].name, SAMPLES[0].points)],
+                   key="other")
+    with pytest.raises(ValueError):
+        load_template_store(tmp_path / "lib.npz")
+    with pytest.raises(ValueError):
+        load_template_store(tmp_path / "missing.npz")
+
+
+def test_dataset_templates_are_cached(tmp_path, monkeypatch):
+    import shutil
+
+    from dollar import store
+    monkeypatch.setattr(store, "CACHE_DIR", tmp_path / "cache")
+    folder = tmp_path / "gestures"
+    folder.mkdir()
+    for s in SAMPLES[:6]:
+        shutil.copy(DATASET_DIRS["mid_air"] / s.file, folder / s.file)
+
+    first = store.load_template_library(folder)
+    assert [t.name for t in first] == [s.name for s in SAMPLES[:6]]
+    assert len(list((tmp_path / "cache").glob("templates_*.npz"))) == 1
+    #the second call reads the store, the raw points aren't there anymore
+    second = store.load_template_library(folder)
+    assert all(t.raw_points == [] for t in second)
+    np.testing.assert_allclose([t.points for t in second], [t.points for t in first])
+
+    (folder / SAMPLES[0].file).unlink()
+    assert len(store.load_template_library(folder)) == 5
@@ -0,0 +1,35 @@
+# IncrementalRecognizer only goes through DollarRecognizer's public API
+import numpy as np
+import pytest
+
+from dollar import DollarRecognizer, IncrementalRecognizer
+from dollar.store import load_builtin_templates
+from dollar.templates import gesture_points
+
+
+@pytest.fixture
+def recognizer():
+    recognizer = DollarRecognizer(window_h=600)
+    recognizer.add_templates(load_builtin_templates())
+    return recognizer
+
+
+def test_template_matrix_is_read_only(recognizer):
+    matrix = recognizer.template_matrix()
+    assert matrix.shape == (len(recognizer.templates), 64, 2)
+    with pytest.raises(ValueError):
+        matrix[0, 0, 0] = 1.0
+
+
+@pytest.mark.parametrize("name", ["circle", "check", "pigtail"])
+def test_incremental_matches_recognize(recognizer, name):
+    recognizer.window_h = 900
+    #pyglet coordinates, y up
+    points = [(x, 900 - y) for x, y in gesture_points[name]]
+    stroke = IncrementalRecognizer(recognizer)
+    for x, y in points:
+        stroke.add_point(x, y)
+    assert stroke.partial().name == name
+    assert stroke.finish().name == recognizer.recognize(points).name == name
+    np.testing.assert_allclose(stroke.finish().score, recognizer.recognize(points).score,
+                               atol=1e-3)